@@ -6,17 +6,25 @@ Now with workspace management support
 """
 import os
 import sys
+import logging
 import argparse
-from dotenv import load_dotenv
 
-from src.config_loader import ConfigLoader
-from src.factory import ConverterFactory
-from src.pipeline import PDFToLatexPipeline
-from src.utils import CheckpointManager, LatexIntegrator, LatexCompiler
-from src.converters.latex_error_fixer import LatexErrorFixer
 from src.workspace_manager import WorkspaceManager
 
 
+def setup_logging(level: int = logging.INFO):
+    """
+    Send log records to stdout next to the pipeline's print() output
+    
+    Records are written by the thread that logs them rather than handed to a
+    background listener, so they appear in the order they were made relative
+    to print(); a line to the terminal costs far less than a page conversion.
+    """
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', stream=sys.stdout)
+    # Only the pipeline's own loggers are verbose; HTTP client libraries stay at WARNING
+    logging.getLogger('src').setLevel(level)
+
+
 def cmd_workspace_list(workspace_mgr: WorkspaceManager, args):
     """List all workspaces"""
     workspaces = workspace_mgr.list_workspaces()
@@ -86,12 +94,25 @@ def cmd_workspace_delete(workspace_mgr: WorkspaceManager, args):
 
 def cmd_convert(workspace_mgr: WorkspaceManager, args):
     """Run conversion on current workspace or specified PDF"""
-    # Load environment variables
-    load_dotenv()
+    # Imported here so workspace subcommands don't load converters and imaging libraries
+    from src.config_loader import ConfigLoader
+    from src.factory import ConverterFactory
+    from src.pipeline import PDFToLatexPipeline
+    from src.utils import CheckpointManager, LatexIntegrator, LatexCompiler
+    from src.converters.latex_error_fixer import LatexErrorFixer
     
     # Load configuration
     config = ConfigLoader(args.config)
     
+    # Load environment variables from .env only if the API keys are not already set
+    api_key_envs = {
+        config.get('converters.image_to_latex.api_key_env', 'GEMINI_API_KEY'),
+        config.get('converters.latex_error_fixer.api_key_env', 'GEMINI_API_KEY'),
+    }
+    if not all(env in os.environ for env in api_key_envs):
+        from dotenv import load_dotenv
+        load_dotenv()
+    
     # Determine PDF path and output directory
     if args.workspace:
         # Use specified workspace
@@ -142,7 +163,9 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
         print(f"   Falling back to dummy converter for testing")
         converter_type = 'dummy'
     
-    # Create rate limiter
+    # Create rate limiter (one token bucket, shared by the converter's threads or
+    # asyncio tasks and the error fixer, so they stay within one API budget)
+    max_in_flight = latex_config.get('max_in_flight', 1)
     rate_limit_config = latex_config.get('rate_limit', {})
     rate_limiter = ConverterFactory.create_rate_limiter(
         max_requests=rate_limit_config.get('max_requests', 2),
@@ -152,7 +175,8 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
     # Create converters using factory pattern
     pdf_converter = ConverterFactory.create_pdf_converter(
         dpi=pdf_config.get('dpi', 300),
-        enable_diff_check=pdf_config.get('enable_diff_check', True)
+        enable_diff_check=pdf_config.get('enable_diff_check', True),
+        num_workers=args.num_workers or pdf_config.get('num_workers')
     )
     
     image_converter = ConverterFactory.create_image_to_latex_converter(
@@ -162,7 +186,8 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
         max_retries=latex_config.get('max_retries', 3),
         timeout=latex_config.get('timeout', 120),
         retry_delay=latex_config.get('retry_delay', 5),
-        rate_limiter=rate_limiter
+        rate_limiter=rate_limiter,
+        max_in_flight=max_in_flight
     )
     
     # Create checkpoint manager and integrator
@@ -201,7 +226,11 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
         compiler_config = config.config.get('latex_compiler', {})
         latex_compiler = LatexCompiler(
             compiler=compiler_config.get('compiler', 'xelatex'),
-            output_dir=output_dir
+            output_dir=output_dir,
+            precompile_preamble=compiler_config.get('precompile_preamble', True),
+            niceness=compiler_config.get('nice', 0),
+            cpu_cores=compiler_config.get('cpu_cores'),
+            cache_dir=os.path.join(output_dir, '.compile_cache') if compiler_config.get('compile_cache', True) else None
         )
         
         # Create LaTeX error fixer
@@ -241,7 +270,9 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
         latex_compiler=latex_compiler,
         latex_error_fixer=latex_error_fixer,
         compile_and_fix=compile_and_fix,
-        max_fix_attempts=max_fix_attempts
+        max_fix_attempts=max_fix_attempts,
+        concurrency=max_in_flight,
+        compile_workers=pipeline_config.get('compile_workers', 0)
     )
     
     # Run pipeline
@@ -271,12 +302,13 @@ def cmd_convert(workspace_mgr: WorkspaceManager, args):
     return 0
 
 
-def main():
-    """Main entry point with workspace management"""
-    
-    # Initialize workspace manager
-    workspace_mgr = WorkspaceManager()
+def _build_parser():
+    """
+    Build the command line parser
     
+    Returns:
+        Tuple of (main parser, workspace subcommand parser)
+    """
     # Create main parser
     parser = argparse.ArgumentParser(
         description='Convert PDF handwritten notes to LaTeX with workspace management',
@@ -362,12 +394,29 @@ Examples:
         action='store_true',
         help='Start fresh instead of resuming from checkpoint'
     )
+    convert_parser.add_argument(
+        '--num-workers',
+        type=int,
+        help='Number of processes used to rasterize PDF pages'
+    )
     convert_parser.add_argument(
         '--add-page-titles',
         action='store_true',
         help='Add page number as a title for each page section'
     )
     
+    return parser, workspace_parser
+
+
+def main():
+    """Main entry point with workspace management"""
+    setup_logging()
+    
+    # Initialize workspace manager
+    workspace_mgr = WorkspaceManager()
+    
+    parser, workspace_parser = _build_parser()
+    
     # Parse arguments
     args = parser.parse_args()
     
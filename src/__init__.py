@@ -1,4 +1,30 @@
 """
 AInotes - Modular PDF to LaTeX Converter
 """
+import sys
+import logging
+
 __version__ = "2.0.0"
+
+
+class _DefaultHandler(logging.StreamHandler):
+    """
+    Write progress records to stdout, as print() did, until logging is configured
+    
+    Library users who never set up logging still see the pipeline's INFO
+    progress; once the root logger has handlers (e.g. main.setup_logging()),
+    records only go there.
+    """
+    
+    def emit(self, record):
+        if logging.getLogger().handlers:
+            return
+        # Looked up per record so redirections of sys.stdout are honored
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+_handler = _DefaultHandler()
+_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.getLogger(__name__).addHandler(_handler)
+logging.getLogger(__name__).setLevel(logging.INFO)
@@ -3,11 +3,17 @@ Configuration loader for the pipeline
 Supports YAML and JSON configuration files
 """
 import os
-import json
+import mmap
 import yaml
+from contextlib import nullcontext
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from .utils import fast_json
+
+# Prefer the libyaml C parser when PyYAML was built with it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class ConfigLoader:
     """Loads and manages configuration from YAML or JSON files"""
@@ -22,6 +28,7 @@ class ConfigLoader:
         """
         self.config_path = config_path
         self.config: Dict[str, Any] = {}
+        self._flat: Dict[str, Any] = {}
         
         if config_path:
             self.load(config_path)
@@ -59,28 +66,46 @@ class ConfigLoader:
         # Determine file type from extension
         ext = Path(config_path).suffix.lower()
         
-        with open(config_path, 'r') as f:
-            if ext in ['.yaml', '.yml']:
-                self.config = yaml.safe_load(f)
-            elif ext == '.json':
-                self.config = json.load(f)
+        if ext not in ['.yaml', '.yml', '.json']:
+            raise ValueError(f"Unsupported config file type: {ext}. Use .yaml, .yml, or .json")
+        
+        with open(config_path, 'rb') as f:
+            # Parse straight from the page cache instead of copying the file first
+            # (empty files can't be mapped)
+            if os.fstat(f.fileno()).st_size:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             else:
-                raise ValueError(f"Unsupported config file type: {ext}. Use .yaml, .yml, or .json")
+                data = nullcontext(b'')
+            with data as buf:
+                if ext == '.json':
+                    with memoryview(buf) as view:
+                        self.config = fast_json.loads(view)
+                else:
+                    self.config = yaml.load(buf, Loader=_YamlLoader)
+        
+        # Flatten once so dot-notation lookups are a single dict access
+        self._flat = dict(self._flatten(self.config))
         
         print(f"✓ Loaded configuration from {config_path}")
     
+    @staticmethod
+    def _flatten(data: Any, prefix: str = ''):
+        """
+        Yield (dotted_key, value) pairs for every node of a nested dict
+        
+        Intermediate dicts are yielded too, so whole subtrees stay addressable.
+        """
+        if not isinstance(data, dict):
+            return
+        for k, v in data.items():
+            key = f"{prefix}{k}"
+            yield key, v
+            if isinstance(v, dict):
+                yield from ConfigLoader._flatten(v, f"{key}.")
+    
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value by key (supports dot notation)"""
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
+        return self._flat.get(key, default)
     
     def get_converter_config(self, converter_type: str = 'image_to_latex') -> Dict[str, Any]:
         """Get converter-specific configuration"""
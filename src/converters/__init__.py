@@ -1,10 +1,17 @@
 """
 Converter modules for the PDF to LaTeX pipeline
+Converters are imported lazily on first access so that commands which never
+convert anything don't pay for heavy SDK / imaging imports
 """
-from .base import ImageToLatexConverterBase, PDFToImageConverterBase
-from .gemini_converter import GeminiImageToLatexConverter
-from .dummy_converter import DummyImageToLatexConverter
-from .pdf_converter import PDFToImageConverter
+import importlib
+
+_LAZY = {
+    'ImageToLatexConverterBase': '.base',
+    'PDFToImageConverterBase': '.base',
+    'GeminiImageToLatexConverter': '.gemini_converter',
+    'DummyImageToLatexConverter': '.dummy_converter',
+    'PDFToImageConverter': '.pdf_converter',
+}
 
 __all__ = [
     'ImageToLatexConverterBase',
@@ -13,3 +20,16 @@ __all__ = [
     'DummyImageToLatexConverter',
     'PDFToImageConverter',
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
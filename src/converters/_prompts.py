@@ -0,0 +1,51 @@
+"""
+Prompts shared by the AI converters and the LaTeX error fixer
+"""
+
+# Default prompt for converting a page image to LaTeX
+DEFAULT_PROMPT = """Convert this handwritten mathematical content to LaTeX code.
+
+Instructions:
+- Output ONLY the LaTeX code, no explanations
+- Use proper LaTeX math environments (equation, align, etc.)
+- For inline math use $...$, for display math use $$...$$ or equation environments
+- Preserve the structure and organization of the content
+- If there are sections or titles, use appropriate LaTeX commands
+- Be precise with mathematical notation
+
+Output only the LaTeX code."""
+
+# Prompt for re-converting a page that only partly changed, filled with
+# str.format(previous_latex=...)
+REVISION_PROMPT = DEFAULT_PROMPT.replace("{", "{{").replace("}", "}}") + """
+
+This page was converted before and most of it is unchanged. The LaTeX produced
+for the previous version of the page is below; keep it wherever the image still
+matches and only rewrite the parts that changed.
+
+PREVIOUS LATEX CODE:
+```latex
+{previous_latex}
+```"""
+
+# Prompt for fixing compilation errors, filled with str.format(error_description=..., latex_code=...)
+FIX_ERRORS_PROMPT = """You are a LaTeX expert. The following LaTeX code has compilation errors.
+Please fix ALL the errors and return ONLY the corrected LaTeX code.
+
+{error_description}
+
+ORIGINAL LATEX CODE:
+```latex
+{latex_code}
+```
+
+Instructions:
+- Fix ALL compilation errors
+- Preserve the original content and meaning
+- Return ONLY the corrected LaTeX code
+- Do NOT include explanations or comments
+- Do NOT wrap the output in markdown code blocks
+- Ensure all math environments are properly closed
+- Check for missing packages, undefined commands, or syntax errors
+
+CORRECTED LATEX CODE:"""
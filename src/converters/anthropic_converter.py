@@ -5,15 +5,60 @@ Uses Anthropic's Claude models (Haiku 4.5 / Sonnet 4.5) to convert handwritten n
 import os
 import re
 import time
+import mmap
 import base64
-from typing import Optional
+import asyncio
+import logging
+from typing import Dict, List, Optional
 
-from .base import ImageToLatexConverterBase
+from ..utils.backoff import backoff_delay
+from .base import ImageToLatexConverterBase, ConcurrentConversionMixin
+from ._prompts import DEFAULT_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Matches opening ```latex and closing ``` markdown fences in one pass
+_RE_FENCE = re.compile(r'```(?:latex)?\s*')
+
+# Minimum prompt-cache prefix lengths in tokens, by model name prefix; other
+# models need 1024. Prompts are sized at roughly 4 characters per token
+_MIN_CACHEABLE_TOKENS = (
+    ('claude-opus-4-5', 4096),
+    ('claude-haiku-4-5', 4096),
+    ('claude-3-5-haiku', 2048),
+    ('claude-3-haiku', 2048),
+)
+_CHARS_PER_TOKEN = 4
+
+
+def _min_cacheable_tokens(model: str) -> int:
+    """Shortest prefix, in tokens, that the model caches"""
+    for prefix, tokens in _MIN_CACHEABLE_TOKENS:
+        if model.startswith(prefix):
+            return tokens
+    return 1024
+
+
+# Extracts per-image results from a multi-image batch response
+_BATCH_RESULT = re.compile(r'<<<I=(\d+)>>>(.*?)<<<END>>>', re.DOTALL)
+
+_BATCH_INSTRUCTIONS = """The {count} images above are labelled Image 1 to Image {count}.
+Convert each image separately, following these instructions for every image:
+
+{prompt}
+
+Wrap the result for image i between <<<I=i>>> and <<<END>>>, for example:
+<<<I=1>>>
+...LaTeX for image 1...
+<<<END>>>"""
 
 
 class AnthropicImageToLatexConverter(ImageToLatexConverterBase):
     """Converts handwritten notes images to LaTeX using Anthropic Claude with retry logic"""
     
+    # Maximum images packed into a single convert_batch request
+    max_batch_size = 4
+    
     def __init__(
         self, 
         api_key: str, 
@@ -41,166 +86,433 @@ class AnthropicImageToLatexConverter(ImageToLatexConverterBase):
         self.retry_delay = retry_delay
         self.rate_limiter = rate_limiter
         
-    def convert(self, image_path: str, custom_prompt: Optional[str] = None) -> str:
-        """
-        Convert image of handwritten notes to LaTeX with retry logic and rate limiting
-        
-        Args:
-            image_path: Path to image file
-            custom_prompt: Optional custom prompt for conversion
-            
-        Returns:
-            LaTeX code as string
-        """
+        # Imported here so loading this module doesn't pull in the SDK
         try:
             import anthropic
-            from anthropic import AuthenticationError, RateLimitError
         except ImportError:
             raise ImportError(
                 "anthropic not installed. Install with: pip install anthropic"
             )
         
-        # Create Anthropic client
-        client = anthropic.Anthropic(
+        # Create the client once so HTTP keep-alive is reused across pages
+        self._client = anthropic.Anthropic(
             api_key=self.api_key,
             timeout=self.timeout
         )
-        
-        # Read and encode image to base64
-        with open(image_path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode("utf-8")
-        
-        # Determine image mime type from file extension
-        ext = os.path.splitext(image_path)[1].lower()
-        mime_type_map = {
+        self._AuthenticationError = anthropic.AuthenticationError
+        self._RateLimitError = anthropic.RateLimitError
+        self._APITimeoutError = anthropic.APITimeoutError
+        self._mime_map = {
             '.png': 'image/png',
             '.jpg': 'image/jpeg',
             '.jpeg': 'image/jpeg',
             '.gif': 'image/gif',
             '.webp': 'image/webp'
         }
-        mime_type = mime_type_map.get(ext, 'image/png')
         
-        # Default prompt
-        if custom_prompt is None:
-            prompt = """Convert this handwritten mathematical content to LaTeX code.
-
-Instructions:
-- Output ONLY the LaTeX code, no explanations
-- Use proper LaTeX math environments (equation, align, etc.)
-- For inline math use $...$, for display math use $$...$$ or equation environments
-- Preserve the structure and organization of the content
-- If there are sections or titles, use appropriate LaTeX commands
-- Be precise with mathematical notation
-
-Output only the LaTeX code."""
-        else:
-            prompt = custom_prompt
+    def convert(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Convert image of handwritten notes to LaTeX with retry logic and rate limiting
+        
+        Args:
+            image_path: Path to image file
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
+            
+        Returns:
+            LaTeX code as string
+        """
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
+        # Image before the instructions, as Anthropic recommends for vision prompts
+        content = [
+            self._image_block(image_path, mime_type),
+            self._prompt_block(prompt)
+        ]
+        
+        latex_code = self._send_with_retry(
+            content,
+            name=os.path.basename(image_path),
+            target=image_path
+        )
+        
+        # Clean up markdown code blocks if present
+        return self._clean_response(latex_code)
+    
+    def convert_batch(
+        self,
+        image_paths: List[str],
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> List[str]:
+        """
+        Convert several images using one API request per `max_batch_size` images
+        
+        Every image is sent as its own content block and the model is asked to
+        tag each result, so the response can be split back into pages. Images
+        whose result cannot be recovered are converted individually.
         
-        # Retry logic
+        Args:
+            image_paths: Paths to image files
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type shared by all images, detected per file if omitted
+            
+        Returns:
+            List of LaTeX code strings in the same order as image_paths
+        """
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
+        results: List[str] = []
+        
+        for start in range(0, len(image_paths), self.max_batch_size):
+            batch = image_paths[start:start + self.max_batch_size]
+            if len(batch) == 1:
+                results.append(self.convert(batch[0], custom_prompt, mime_type))
+                continue
+            
+            content = []
+            for i, image_path in enumerate(batch, start=1):
+                content.append({"type": "text", "text": f"Image {i}:"})
+                content.append(self._image_block(image_path, mime_type))
+            content.append({
+                "type": "text",
+                "text": _BATCH_INSTRUCTIONS.format(count=len(batch), prompt=prompt)
+            })
+            
+            basenames = [os.path.basename(path) for path in batch]
+            names = ", ".join(basenames)
+            response = self._send_with_retry(
+                content,
+                name=names,
+                target=names,
+                max_tokens=4096 * len(batch)
+            )
+            
+            # Split the tagged response back into one result per image
+            parsed = {
+                int(match.group(1)): self._clean_response(match.group(2))
+                for match in _BATCH_RESULT.finditer(response or "")
+            }
+            for i, image_path in enumerate(batch, start=1):
+                if i in parsed:
+                    results.append(parsed[i])
+                else:
+                    logger.warning(f"⚠️ No tagged result for {basenames[i - 1]} in batch response, converting individually")
+                    results.append(self.convert(image_path, custom_prompt, mime_type))
+        
+        return results
+    
+    def _prompt_block(self, prompt: str) -> Dict:
+        """
+        Build the prompt text block
+        
+        Only prompts that on their own reach the model's minimum cacheable
+        length get a prompt-caching breakpoint; for shorter ones it would have
+        no effect. The cached prefix includes the page image, so it is read
+        back when a page is retried.
+        """
+        block = {"type": "text", "text": prompt}
+        if len(prompt) // _CHARS_PER_TOKEN >= _min_cacheable_tokens(self.model):
+            block["cache_control"] = {"type": "ephemeral"}
+        return block
+    
+    def _image_block(self, image_path: str, mime_type: Optional[str] = None) -> Dict:
+        """Build a base64 image content block for the messages API"""
+        if mime_type is None:
+            # Determine image mime type from file extension
+            ext = os.path.splitext(image_path)[1].lower()
+            mime_type = self._mime_map.get(ext, 'image/png')
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": mime_type,
+                "data": self._encode_image(image_path),
+            },
+        }
+    
+    def _send_with_retry(
+        self,
+        content: List[Dict],
+        name: str,
+        target: str,
+        max_tokens: int = 4096
+    ) -> str:
+        """
+        Send one messages.create request with retry logic and rate limiting
+        
+        Args:
+            content: Content blocks of the user message
+            name: Short description used in progress output
+            target: Description used in the final error message
+            max_tokens: Maximum tokens to generate
+            
+        Returns:
+            Raw response text
+        """
         last_exception = None
         for attempt in range(1, self.max_retries + 1):
             try:
                 # Apply rate limiting before making request
                 if self.rate_limiter:
-                    status = self.rate_limiter.get_status()
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})")
-                    print(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
+                    logger.info(f"🔄 Converting {name} to LaTeX (attempt {attempt}/{self.max_retries})")
+                    if logger.isEnabledFor(logging.INFO):
+                        status = self.rate_limiter.get_status()
+                        logger.info(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
                     self.rate_limiter.wait_if_needed()
                 else:
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    logger.info(f"🔄 Converting {name} to LaTeX (attempt {attempt}/{self.max_retries})...")
                 
                 # Create message with vision
-                message = client.messages.create(
+                message = self._client.messages.create(
                     model=self.model,
-                    max_tokens=4096,
+                    max_tokens=max_tokens,
                     messages=[
                         {
                             "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": mime_type,
-                                        "data": image_data,
-                                    },
-                                },
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                }
-                            ],
+                            "content": content,
                         }
                     ],
                 )
                 
-                # Extract text from response
-                latex_code = message.content[0].text
-                
-                # Clean up markdown code blocks if present
-                latex_code = self._clean_response(latex_code)
-                
-                print(f"✓ Successfully converted {os.path.basename(image_path)}")
-                return latex_code
+                logger.info(f"✓ Successfully converted {name}")
+                return message.content[0].text
                 
-            except AuthenticationError as e:
-                print(f"❌ API key invalid: {e}")
+            except self._AuthenticationError as e:
+                logger.error(f"❌ API key invalid: {e}")
                 raise
                 
-            except RateLimitError as e:
+            except self._RateLimitError as e:
                 last_exception = e
-                print(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
+                logger.warning(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
                     raise Exception(
-                        f"Failed to convert {image_path} after {self.max_retries} attempts: Rate limit exceeded"
+                        f"Failed to convert {target} after {self.max_retries} attempts: Rate limit exceeded"
                     ) from last_exception
                     
-            except anthropic.APITimeoutError as e:
+            except self._APITimeoutError as e:
                 last_exception = e
-                print(f"⚠️ Request timeout on attempt {attempt}: {e}")
+                logger.warning(f"⚠️ Request timeout on attempt {attempt}: {e}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
                     raise Exception(
-                        f"Failed to convert {image_path} after {self.max_retries} attempts: Timeout"
+                        f"Failed to convert {target} after {self.max_retries} attempts: Timeout"
                     ) from last_exception
                     
             except Exception as e:
                 last_exception = e
                 error_msg = str(e)
                 
-                print(f"⚠️ Attempt {attempt} failed: {error_msg}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {error_msg}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt  # Exponential backoff
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
                     raise Exception(
-                        f"Failed to convert {image_path} after {self.max_retries} attempts: {error_msg}"
+                        f"Failed to convert {target} after {self.max_retries} attempts: {error_msg}"
                     ) from last_exception
         
         # Should never reach here, but just in case
         raise last_exception
     
+    def _encode_image(self, image_path: str) -> str:
+        """
+        Base64-encode an image file straight from a read-only memory map
+        
+        Args:
+            image_path: Path to image file
+            
+        Returns:
+            Base64 encoded image data as ASCII string
+        """
+        with open(image_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return base64.b64encode(mm).decode('ascii')
+    
     def _clean_response(self, text: str) -> str:
         """Remove markdown code blocks and extra formatting"""
         if text is None:
             return ""
         
         # Remove ```latex ... ``` blocks
-        text = re.sub(r'```latex\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
-        return text.strip()
\ No newline at end of file
+        return _RE_FENCE.sub('', text).strip()
+
+
+class AsyncAnthropicImageToLatexConverter(AnthropicImageToLatexConverter, ConcurrentConversionMixin):
+    """
+    Anthropic converter that fans out many pages concurrently
+
+    Uses anthropic.AsyncAnthropic with at most `max_in_flight` requests in flight.
+    The synchronous convert() inherited from the parent is still available.
+    """
+    
+    def __init__(
+        self, 
+        api_key: str, 
+        model: str = "claude-haiku-4-5-20251001",
+        max_retries: int = 3,
+        timeout: int = 120,
+        retry_delay: int = 5,
+        rate_limiter: Optional[object] = None,
+        max_in_flight: int = 4
+    ):
+        """
+        Initialize async Anthropic converter
+        
+        Args:
+            api_key: Anthropic API key
+            model: Model name to use (claude-haiku-4-5-20251001 or claude-sonnet-4-5-20250929)
+            max_retries: Maximum number of retry attempts
+            timeout: Timeout in seconds for API calls
+            retry_delay: Base delay between retries (exponential backoff)
+            rate_limiter: Optional rate limiter instance
+            max_in_flight: Maximum number of concurrent API requests
+        """
+        super().__init__(
+            api_key=api_key,
+            model=model,
+            max_retries=max_retries,
+            timeout=timeout,
+            retry_delay=retry_delay,
+            rate_limiter=rate_limiter
+        )
+        self.max_in_flight = max(1, max_in_flight)
+        
+        # Created on first use in each event loop; all pages share its connection pool
+        self.async_client = None
+    
+    def _create_async_client(self):
+        """
+        Create the AsyncAnthropic client with a pool sized for max_in_flight
+        
+        Returns:
+            anthropic.AsyncAnthropic instance
+        """
+        import anthropic
+        # httpx is a dependency of the anthropic SDK
+        import httpx
+        
+        limits = httpx.Limits(
+            max_connections=self.max_in_flight,
+            max_keepalive_connections=self.max_in_flight,
+            keepalive_expiry=30
+        )
+        http_client = anthropic.DefaultAsyncHttpxClient(limits=limits, timeout=self.timeout)
+        return anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            timeout=self.timeout,
+            http_client=http_client
+        )
+    
+    def _on_new_loop(self):
+        """Pooled connections belong to the previous loop, start a fresh pool"""
+        self.async_client = None
+    
+    async def aclose(self):
+        """Close the async client's connection pool while its event loop still runs"""
+        client, self.async_client = self.async_client, None
+        if client is not None:
+            await client.close()
+    
+    async def convert_async(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Convert a single image while holding a slot of the concurrency semaphore
+        
+        Args:
+            image_path: Path to image file
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
+            
+        Returns:
+            LaTeX code as string
+        """
+        self._bind_to_running_loop()
+        if self.async_client is None:
+            self.async_client = self._create_async_client()
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
+        name = os.path.basename(image_path)
+        
+        async with self._semaphore:
+            # Encode inside the semaphore so only in-flight images are held in memory
+            content = [
+                self._image_block(image_path, mime_type),
+                self._prompt_block(prompt)
+            ]
+            
+            # Retry logic
+            last_exception = None
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    logger.info(f"🔄 Converting {name} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    await self._wait_for_rate_limit()
+                    
+                    # Create message with vision
+                    message = await self.async_client.messages.create(
+                        model=self.model,
+                        max_tokens=4096,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": content,
+                            }
+                        ],
+                    )
+                    
+                    # Extract text and clean up markdown code blocks if present
+                    latex_code = self._clean_response(message.content[0].text)
+                    
+                    logger.info(f"✓ Successfully converted {name}")
+                    return latex_code
+                    
+                except self._AuthenticationError as e:
+                    logger.error(f"❌ API key invalid: {e}")
+                    raise
+                    
+                except Exception as e:
+                    last_exception = e
+                    if isinstance(e, self._RateLimitError):
+                        reason = "Rate limit exceeded"
+                        logger.warning(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
+                    elif isinstance(e, self._APITimeoutError):
+                        reason = "Timeout"
+                        logger.warning(f"⚠️ Request timeout on attempt {attempt}: {e}")
+                    else:
+                        reason = str(e)
+                        logger.warning(f"⚠️ Attempt {attempt} failed: {reason}")
+                    
+                    if attempt < self.max_retries:
+                        wait_time = backoff_delay(self.retry_delay, attempt, e)
+                        logger.info(f"   Retrying in {wait_time:.1f} seconds...")
+                        await asyncio.sleep(wait_time)
+                    else:
+                        logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
+                        raise Exception(
+                            f"Failed to convert {image_path} after {self.max_retries} attempts: {reason}"
+                        ) from last_exception
+            
+            # Should never reach here, but just in case
+            raise last_exception
@@ -1,13 +1,59 @@
 """
 Abstract base classes for converters to ensure loose coupling
 """
+import os
+import asyncio
+import hashlib
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
 
 
 class PDFToImageConverterBase(ABC):
     """Abstract base class for PDF to Image converters"""
     
+    # MIME type of the images written by convert()
+    mime_type = 'image/png'
+    
+    # Extra checkpoint fields per page (page_num -> dict) from the last conversion
+    page_metadata: Dict[int, Dict]
+    
+    # Digests of the images written by the last conversion, computed while they
+    # were encoded (page_num -> {'image_hash': ..., 'tile_hashes': [...]});
+    # pages whose image was kept from an earlier run have no entry
+    image_digests: Dict[int, Dict]
+    
+    def __init__(self):
+        """Start with no per-page results; each instance gets its own dicts"""
+        self.page_metadata = {}
+        self.image_digests = {}
+    
+    @staticmethod
+    def source_fingerprint(pdf_path: str, head_size: int = 1 << 20) -> Dict:
+        """
+        Cheap fingerprint of a PDF file for detecting that it hasn't changed
+        
+        Size and nanosecond mtime catch ordinary edits; the hash of the first
+        head_size bytes also catches copies that preserve the mtime.
+        
+        Args:
+            pdf_path: Path to PDF file
+            head_size: Number of leading bytes to hash
+            
+        Returns:
+            Dict of checkpoint fields (source_size, source_mtime_ns, source_head_hash)
+        """
+        stat = os.stat(pdf_path)
+        with open(pdf_path, 'rb') as f:
+            head_hash = hashlib.blake2b(f.read(head_size), digest_size=16).hexdigest()
+        return {
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_head_hash': head_hash
+        }
+    
     @abstractmethod
     def convert(
         self, 
@@ -27,19 +73,49 @@ class PDFToImageConverterBase(ABC):
             Tuple of (list of image file paths, dict mapping page_num -> image_version)
         """
         pass
+    
+    def iter_pages(
+        self,
+        pdf_path: str,
+        output_dir: str = "output/images",
+        checkpoint: Optional[Dict] = None
+    ) -> Iterator[Tuple[int, str, int]]:
+        """
+        Yield pages as they become available
+        
+        The default implementation converts the whole PDF first; subclasses can
+        override it to yield each page as soon as its image is written.
+        
+        Args:
+            pdf_path: Path to PDF file
+            output_dir: Directory to save images
+            checkpoint: Current checkpoint data for version tracking
+            
+        Yields:
+            Tuples of (page_num, image_path, image_version), in any order
+        """
+        images, image_versions = self.convert(pdf_path, output_dir, checkpoint)
+        for image_path, (page_num, version) in zip(images, sorted(image_versions.items())):
+            yield page_num, image_path, version
 
 
 class ImageToLatexConverterBase(ABC):
     """Abstract base class for Image to LaTeX converters"""
     
     @abstractmethod
-    def convert(self, image_path: str, custom_prompt: Optional[str] = None) -> str:
+    def convert(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
         """
         Convert image to LaTeX code
         
         Args:
             image_path: Path to image file
             custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
             
         Returns:
             LaTeX code as string
@@ -52,3 +128,130 @@ class ImageToLatexConverterBase(ABC):
         Can be overridden by subclasses
         """
         return text.strip()
+
+
+class ConcurrentConversionMixin(ABC):
+    """
+    Async fan-out support for image to LaTeX converters
+    
+    Subclasses implement convert_async(); the mixin provides the concurrency
+    semaphore, non-blocking rate limiting and the batch helpers. List it after
+    the concrete converter so the converter's own methods take precedence.
+    
+    asyncio primitives belong to the event loop that created them, and every
+    asyncio.run() starts a new loop, so they are recreated whenever the running
+    loop changes. Override _on_new_loop() to recreate loop-bound clients too,
+    and aclose() to release them before the loop that owns them ends.
+    """
+    
+    max_in_flight: int = 1
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _rate_limit_lock: Optional[asyncio.Lock] = None
+    
+    @abstractmethod
+    async def convert_async(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Convert a single image while holding a slot of the concurrency semaphore
+        
+        Args:
+            image_path: Path to image file
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
+            
+        Returns:
+            LaTeX code as string
+        """
+        pass
+    
+    async def convert_many(
+        self,
+        image_paths: List[str],
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> List:
+        """
+        Convert several images concurrently
+        
+        Args:
+            image_paths: Paths to image files
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type shared by all images, detected per file if omitted
+            
+        Returns:
+            List in the same order as image_paths holding the LaTeX code for each
+            image, or the exception raised while converting it
+        """
+        logger.info(f"🚀 Converting {len(image_paths)} image(s) with up to {self.max_in_flight} concurrent requests")
+        tasks = [
+            asyncio.create_task(self.convert_async(path, custom_prompt, mime_type))
+            for path in image_paths
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def convert_batch(
+        self,
+        image_paths: List[str],
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> List[str]:
+        """
+        Synchronous wrapper around convert_many()
+        
+        Args:
+            image_paths: Paths to image files
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type shared by all images, detected per file if omitted
+            
+        Returns:
+            List of LaTeX code strings in the same order as image_paths
+            
+        Raises:
+            The first conversion error, after all requests have finished
+        """
+        async def convert_and_close():
+            try:
+                return await self.convert_many(image_paths, custom_prompt, mime_type)
+            finally:
+                await self.aclose()
+        
+        results = asyncio.run(convert_and_close())
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+    
+    def _on_new_loop(self):
+        """Hook called when a previously used converter runs on a new event loop"""
+        pass
+    
+    async def aclose(self):
+        """Release loop-bound resources; call before the running event loop ends"""
+        pass
+    
+    def _bind_to_running_loop(self):
+        """(Re)create the asyncio primitives for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                self._on_new_loop()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(max(1, self.max_in_flight))
+            self._rate_limit_lock = asyncio.Lock()
+    
+    async def _wait_for_rate_limit(self):
+        """Apply the rate limiter without blocking the event loop"""
+        rate_limiter = getattr(self, 'rate_limiter', None)
+        if not rate_limiter:
+            return
+        if hasattr(rate_limiter, 'acquire'):
+            await rate_limiter.acquire()
+            return
+        # Synchronous limiters are serialized and run off the event loop
+        async with self._rate_limit_lock:
+            await asyncio.to_thread(rate_limiter.wait_if_needed)
@@ -4,35 +4,20 @@ Always returns Lorem Ipsum in LaTeX format
 """
 import os
 import time
-import re
+import logging
 from typing import Optional
 
 from .base import ImageToLatexConverterBase
 
+logger = logging.getLogger(__name__)
+
 
 class DummyImageToLatexConverter(ImageToLatexConverterBase):
     """Dummy converter that returns Lorem Ipsum LaTeX - for testing only"""
     
-    def __init__(
-        self, 
-        api_key: str = "dummy_key", 
-        model: str = "dummy-model",
-        max_retries: int = 3,
-        timeout: int = 120,
-        retry_delay: int = 5,
-        rate_limiter: Optional[object] = None
-    ):
-        """Initialize dummy converter - accepts same params as real converter for compatibility"""
-        self.api_key = api_key
-        self.model = model
-        self.max_retries = max_retries
-        self.timeout = timeout
-        self.retry_delay = retry_delay
-        self.rate_limiter = rate_limiter
-        
-        # Different Lorem Ipsum variants for variety
-        self.lorem_variants = [
-            r"""
+    # Different Lorem Ipsum variants for variety
+    _LOREM_VARIANTS = (
+        r"""
 \subsection{Lorem Ipsum Dolor}
 
 Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.
@@ -50,7 +35,7 @@ Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliqu
 
 Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur.
 """,
-            r"""
+        r"""
 \subsection{Mathematical Expressions}
 
 Consider the following integral:
@@ -69,7 +54,7 @@ Lorem ipsum dolor sit amet, where $\alpha + \beta = \gamma$ represents the funda
 
 Excepteur sint occaecat cupidatat non proident.
 """,
-            r"""
+        r"""
 \subsection{Theoretical Framework}
 
 Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium.
@@ -95,7 +80,7 @@ The matrix representation is given by:
 
 At vero eos et accusamus et iusto odio dignissimos.
 """,
-            r"""
+        r"""
 \subsection{Advanced Concepts}
 
 Nemo enim ipsam voluptatem quia voluptas sit aspernatur aut odit aut fugit.
@@ -119,7 +104,7 @@ Temporibus autem quibusdam et aut officiis debitis.
     \nabla \times \vec{E} &= -\frac{\partial \vec{B}}{\partial t}
 \end{align*}
 """,
-            r"""
+        r"""
 \subsection{Derivations and Results}
 
 Quis autem vel eum iure reprehenderit qui in ea voluptate velit esse quam nihil molestiae consequatur.
@@ -143,41 +128,101 @@ $$f(x) = \sum_{n=0}^{\infty} \frac{f^{(n)}(a)}{n!}(x-a)^n$$
 
 Vel illum qui dolorem eum fugiat quo voluptas nulla pariatur.
 """
-        ]
+    )
     
-    def convert(self, image_path: str, custom_prompt: Optional[str] = None) -> str:
+    # UTF-8 encoded variants for callers that write bytes directly
+    _LOREM_VARIANTS_BYTES = tuple(variant.encode('utf-8') for variant in _LOREM_VARIANTS)
+    
+    def __init__(
+        self, 
+        api_key: str = "dummy_key", 
+        model: str = "dummy-model",
+        max_retries: int = 3,
+        timeout: int = 120,
+        retry_delay: int = 5,
+        rate_limiter: Optional[object] = None,
+        simulate_latency: bool = False
+    ):
+        """
+        Initialize dummy converter - accepts same params as real converter for compatibility
+        
+        Args:
+            simulate_latency: Sleep briefly on every conversion to mimic an API call
+        """
+        self.api_key = api_key
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.rate_limiter = rate_limiter
+        self.simulate_latency = simulate_latency
+    
+    def convert(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
         """
         Dummy conversion - returns Lorem Ipsum LaTeX
         
         Args:
             image_path: Path to image file (not actually used)
             custom_prompt: Optional custom prompt (ignored)
+            mime_type: MIME type of the image (ignored)
             
         Returns:
             Lorem Ipsum LaTeX code as string
         """
+        return self._LOREM_VARIANTS[self._pick_variant(image_path)]
+    
+    def convert_bytes(self, image_path: str) -> bytes:
+        """
+        Dummy conversion returning the UTF-8 encoded LaTeX
+        
+        Args:
+            image_path: Path to image file (not actually used)
+            
+        Returns:
+            Lorem Ipsum LaTeX code as UTF-8 bytes, encoded once at import
+        """
+        return self._LOREM_VARIANTS_BYTES[self._pick_variant(image_path)]
+    
+    def _pick_variant(self, image_path: str) -> int:
+        """
+        Simulate a conversion and choose the Lorem Ipsum variant for an image
+        
+        Args:
+            image_path: Path to image file
+            
+        Returns:
+            Index into _LOREM_VARIANTS
+        """
+        name = os.path.basename(image_path)
+        
         # Apply rate limiting if available
         if self.rate_limiter:
-            status = self.rate_limiter.get_status()
-            print(f"🔄 [DUMMY] Converting {os.path.basename(image_path)} to LaTeX")
-            print(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
+            logger.info(f"🔄 [DUMMY] Converting {name} to LaTeX")
+            if logger.isEnabledFor(logging.INFO):
+                status = self.rate_limiter.get_status()
+                logger.info(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
             self.rate_limiter.wait_if_needed()
         else:
-            print(f"🔄 [DUMMY] Converting {os.path.basename(image_path)} to LaTeX...")
+            logger.info(f"🔄 [DUMMY] Converting {name} to LaTeX...")
         
-        # Simulate processing time (0.5-2 seconds)
-        time.sleep(0.5)
+        # Simulate processing time
+        if self.simulate_latency:
+            time.sleep(0.5)
         
         # Get a Lorem Ipsum variant based on image path (for consistency)
         # Extract page number from filename if possible
-        page_match = re.search(r'page(\d+)', image_path)
-        if page_match:
-            page_num = int(page_match.group(1))
-            variant_index = (page_num - 1) % len(self.lorem_variants)
+        _, sep, tail = name.rpartition('page')
+        digits = len(tail) - len(tail.lstrip('0123456789'))
+        if sep and digits:
+            page_num = int(tail[:digits])
+            variant_index = (page_num - 1) % len(self._LOREM_VARIANTS)
         else:
             variant_index = 0
         
-        latex_code = self.lorem_variants[variant_index]
-        
-        print(f"✓ [DUMMY] Successfully converted {os.path.basename(image_path)}")
-        return latex_code
+        logger.info(f"✓ [DUMMY] Successfully converted {name}")
+        return variant_index
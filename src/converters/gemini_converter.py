@@ -4,10 +4,20 @@ Uses Google's Gemini API to convert handwritten notes to LaTeX
 """
 import os
 import re
+import logging
 import time
+import asyncio
+from pathlib import Path
 from typing import Optional
 
-from .base import ImageToLatexConverterBase
+from ..utils.backoff import backoff_delay
+from .base import ImageToLatexConverterBase, ConcurrentConversionMixin
+from ._prompts import DEFAULT_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Matches opening ```latex and closing ``` markdown fences in one pass
+_RE_FENCE = re.compile(r'```(?:latex)?\s*')
 
 
 class GeminiImageToLatexConverter(ImageToLatexConverterBase):
@@ -39,48 +49,44 @@ class GeminiImageToLatexConverter(ImageToLatexConverterBase):
         self.timeout = timeout
         self.retry_delay = retry_delay
         self.rate_limiter = rate_limiter
+        self._client = None
         
-    def convert(self, image_path: str, custom_prompt: Optional[str] = None) -> str:
+    def _get_client(self):
+        """Create the Gemini client on first use and reuse it for later pages"""
+        if self._client is None:
+            try:
+                from google import genai
+            except ImportError:
+                raise ImportError(
+                    "google-genai not installed. Install with: pip install google-genai"
+                )
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+    
+    def convert(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
         """
         Convert image of handwritten notes to LaTeX with retry logic and rate limiting
         
         Args:
             image_path: Path to image file
             custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
             
         Returns:
             LaTeX code as string
         """
-        try:
-            from google import genai
-            from google.genai import types
-        except ImportError:
-            raise ImportError(
-                "google-genai not installed. Install with: pip install google-genai"
-            )
+        client = self._get_client()
+        from google.genai import types
         
-        # Create Gemini client
-        client = genai.Client(api_key=self.api_key)
+        # Read image
+        image_data = Path(image_path).read_bytes()
         
-        # Read and encode image
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-        
-        # Default prompt
-        if custom_prompt is None:
-            prompt = """Convert this handwritten mathematical content to LaTeX code.
-
-Instructions:
-- Output ONLY the LaTeX code, no explanations
-- Use proper LaTeX math environments (equation, align, etc.)
-- For inline math use $...$, for display math use $$...$$ or equation environments
-- Preserve the structure and organization of the content
-- If there are sections or titles, use appropriate LaTeX commands
-- Be precise with mathematical notation
-
-Output only the LaTeX code."""
-        else:
-            prompt = custom_prompt
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
         
         # Retry logic
         last_exception = None
@@ -88,12 +94,13 @@ Output only the LaTeX code."""
             try:
                 # Apply rate limiting before making request
                 if self.rate_limiter:
-                    status = self.rate_limiter.get_status()
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})")
-                    print(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
+                    logger.info(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})")
+                    if logger.isEnabledFor(logging.INFO):
+                        status = self.rate_limiter.get_status()
+                        logger.info(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
                     self.rate_limiter.wait_if_needed()
                 else:
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    logger.info(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})...")
                 
                 # Generate LaTeX with timeout handling
                 # Note: timeout is handled via http_options in the client config
@@ -103,7 +110,7 @@ Output only the LaTeX code."""
                         prompt,
                         types.Part.from_bytes(
                             data=image_data,
-                            mime_type="image/png"
+                            mime_type=mime_type or "image/png"
                         )
                     ]
                 )
@@ -112,21 +119,21 @@ Output only the LaTeX code."""
                 # Clean up markdown code blocks if present
                 latex_code = self._clean_response(latex_code)
                 
-                print(f"✓ Successfully converted {os.path.basename(image_path)}")
+                logger.info(f"✓ Successfully converted {os.path.basename(image_path)}")
                 return latex_code
                 
             except Exception as e:
                 last_exception = e
                 error_msg = str(e)
                 
-                print(f"⚠️ Attempt {attempt} failed: {error_msg}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {error_msg}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt  # Exponential backoff
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
                     raise Exception(
                         f"Failed to convert {image_path} after {self.max_retries} attempts: {error_msg}"
                     ) from last_exception
@@ -137,6 +144,138 @@ Output only the LaTeX code."""
     def _clean_response(self, text: str) -> str:
         """Remove markdown code blocks and extra formatting"""
         # Remove ```latex ... ``` blocks
-        text = re.sub(r'```latex\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
-        return text.strip()
\ No newline at end of file
+        return _RE_FENCE.sub('', text).strip()
+
+
+class AsyncGeminiImageToLatexConverter(GeminiImageToLatexConverter, ConcurrentConversionMixin):
+    """
+    Gemini converter that fans out many pages concurrently
+    
+    Uses the async surface of google-genai (client.aio) with at most
+    `max_in_flight` requests in flight. The synchronous convert() inherited
+    from the parent is still available.
+    """
+    
+    def __init__(
+        self, 
+        api_key: str, 
+        model: str = "gemini-2.0-flash-exp",
+        max_retries: int = 3,
+        timeout: int = 120,
+        retry_delay: int = 5,
+        rate_limiter: Optional[object] = None,
+        max_in_flight: int = 4
+    ):
+        """
+        Initialize async Gemini converter
+        
+        Args:
+            api_key: Google Gemini API key
+            model: Model name to use
+            max_retries: Maximum number of retry attempts
+            timeout: Timeout in seconds for API calls
+            retry_delay: Base delay between retries (exponential backoff)
+            rate_limiter: Optional rate limiter instance
+            max_in_flight: Maximum number of concurrent API requests
+        """
+        super().__init__(
+            api_key=api_key,
+            model=model,
+            max_retries=max_retries,
+            timeout=timeout,
+            retry_delay=retry_delay,
+            rate_limiter=rate_limiter
+        )
+        self.max_in_flight = max(1, max_in_flight)
+        self._async_client = None
+    
+    def _on_new_loop(self):
+        """The async client's connections belong to the previous loop"""
+        self._async_client = None
+    
+    async def aclose(self):
+        """Close the aio client's connections while its event loop still runs"""
+        client, self._async_client = self._async_client, None
+        # AsyncClient.aclose() only exists in recent google-genai releases
+        if client is not None and hasattr(client, 'aclose'):
+            await client.aclose()
+    
+    async def convert_async(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Convert a single image while holding a slot of the concurrency semaphore
+        
+        Args:
+            image_path: Path to image file
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
+            
+        Returns:
+            LaTeX code as string
+        """
+        try:
+            from google import genai
+            from google.genai import types
+        except ImportError:
+            raise ImportError(
+                "google-genai not installed. Install with: pip install google-genai"
+            )
+        
+        self._bind_to_running_loop()
+        if self._async_client is None:
+            # Separate client per event loop, its async connections can't be shared
+            self._async_client = genai.Client(api_key=self.api_key).aio
+        
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
+        name = os.path.basename(image_path)
+        
+        async with self._semaphore:
+            # Read inside the semaphore so only in-flight images are held in memory
+            image_data = Path(image_path).read_bytes()
+            
+            # Retry logic
+            last_exception = None
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    logger.info(f"🔄 Converting {name} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    await self._wait_for_rate_limit()
+                    
+                    response = await self._async_client.models.generate_content(
+                        model=self.model,
+                        contents=[
+                            prompt,
+                            types.Part.from_bytes(
+                                data=image_data,
+                                mime_type=mime_type or "image/png"
+                            )
+                        ]
+                    )
+                    
+                    # Clean up markdown code blocks if present
+                    latex_code = self._clean_response(response.text)
+                    
+                    logger.info(f"✓ Successfully converted {name}")
+                    return latex_code
+                    
+                except Exception as e:
+                    last_exception = e
+                    error_msg = str(e)
+                    
+                    logger.warning(f"⚠️ Attempt {attempt} failed: {error_msg}")
+                    
+                    if attempt < self.max_retries:
+                        wait_time = backoff_delay(self.retry_delay, attempt, e)
+                        logger.info(f"   Retrying in {wait_time:.1f} seconds...")
+                        await asyncio.sleep(wait_time)
+                    else:
+                        logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
+                        raise Exception(
+                            f"Failed to convert {image_path} after {self.max_retries} attempts: {error_msg}"
+                        ) from last_exception
+            
+            # Should never reach here, but just in case
+            raise last_exception
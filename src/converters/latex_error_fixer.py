@@ -4,7 +4,67 @@ Takes LaTeX code with compilation errors and fixes them using an AI model
 """
 import re
 import time
-from typing import Optional, List, Dict
+import logging
+import asyncio
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Iterable, Tuple
+
+from ..utils.backoff import backoff_delay
+from ._prompts import FIX_ERRORS_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Patterns used to clean up AI responses
+_RE_FENCE = re.compile(r'```(?:latex)?\s*')
+_RE_AI_PREFIX = re.compile(
+    r'^(Here is the corrected|Here\'s the fixed|Corrected).*?:\s*',
+    re.IGNORECASE | re.MULTILINE
+)
+_RE_PREAMBLE = re.compile(r'\\documentclass.*?\\begin\{document\}', re.DOTALL | re.IGNORECASE)
+_RE_END_DOCUMENT = re.compile(r'\\end\{document\}', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=64)
+def _environment_pattern(env: str) -> re.Pattern:
+    """Compiled pattern matching \\begin{env} and \\end{env}"""
+    return re.compile(r'\\(begin|end)\{' + re.escape(env) + r'\}')
+
+
+def _environment_tags(code: str, env: str):
+    """Yield (is_begin, match) for every \\begin{env} / \\end{env} in code"""
+    for match in _environment_pattern(env).finditer(code):
+        yield match.group(1) == 'begin', match
+
+
+def _close_environment(code: str, match: re.Match) -> Optional[str]:
+    """Append the \\end{env} for an environment that is never closed"""
+    env = match.group(1)
+    depth = sum(1 if is_begin else -1 for is_begin, _ in _environment_tags(code, env))
+    if depth <= 0:
+        return None
+    return code.rstrip() + f"\n\\end{{{env}}}\n"
+
+
+def _drop_unmatched_end(code: str, match: re.Match) -> Optional[str]:
+    """Remove the first \\end{env} that has no matching \\begin{env}"""
+    env = match.group(1)
+    depth = 0
+    for is_begin, tag in _environment_tags(code, env):
+        depth += 1 if is_begin else -1
+        if depth < 0:
+            return code[:tag.start()] + code[tag.end():]
+    return None
+
+
+# Deterministic fixes tried before calling the AI service:
+# (pattern matched against the error message, fix(code, match) -> new code or None)
+_LOCAL_FIXES = (
+    (re.compile(r'\\begin\{([^}]+)\} on input line \d+ ended by \\end\{document\}'), _close_environment),
+    (re.compile(r'\\begin\{document\} ended by \\end\{([^}]+)\}'), _drop_unmatched_end),
+)
 
 
 class LatexErrorFixer:
@@ -17,7 +77,8 @@ class LatexErrorFixer:
         model: Optional[str] = None,
         max_retries: int = 3,
         retry_delay: int = 5,
-        rate_limiter: Optional[object] = None
+        rate_limiter: Optional[object] = None,
+        cache_size: int = 128
     ):
         """
         Initialize LaTeX error fixer
@@ -29,6 +90,7 @@ class LatexErrorFixer:
             max_retries: Maximum number of retry attempts
             retry_delay: Base delay between retries
             rate_limiter: Optional rate limiter instance
+            cache_size: Number of recent fixes to remember (0 disables the cache)
         """
         self.converter_type = converter_type.lower()
         self.api_key = api_key
@@ -36,6 +98,21 @@ class LatexErrorFixer:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.rate_limiter = rate_limiter
+        self._client = None
+        # Serializes the rate limiter when fixes run on worker threads
+        self._rate_limit_lock = threading.Lock()
+        
+        # LRU cache of fixes keyed by (code digest, errors)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Resolve the backend once instead of dispatching on every call
+        self._backend_call = {
+            'gemini': self._call_gemini,
+            'openai': self._call_openai,
+            'anthropic': self._call_anthropic,
+        }.get(self.converter_type)
         
     def _get_default_model(self) -> str:
         """Get default model for the converter type"""
@@ -66,50 +143,156 @@ class LatexErrorFixer:
         if not errors:
             return latex_code
         
-        print(f"\n🔧 Attempting to fix {len(errors)} compilation error(s)...")
+        cache_key = self._cache_key(latex_code, errors)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.info(f"\n♻️ Reusing cached fix for {len(errors)} compilation error(s)")
+            return cached
+        
+        fixed_code = self._fix_uncached(latex_code, errors)
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[cache_key] = fixed_code
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return fixed_code
+    
+    @staticmethod
+    def _cache_key(latex_code: str, errors: List[Dict[str, str]]) -> tuple:
+        """
+        Build the cache key for a fix request
+        
+        Only the line and message of each error go into the prompt, so the
+        compiler context (which names the temporary file) is left out.
+        """
+        digest = hashlib.blake2b(latex_code.encode('utf-8'), digest_size=16).digest()
+        return digest, tuple((str(e.get('line', '?')), e.get('message', '')) for e in errors)
+    
+    def _fix_uncached(self, latex_code: str, errors: List[Dict[str, str]]) -> str:
+        """Fix errors locally where possible and ask the AI service for the rest"""
+        logger.info(f"\n🔧 Attempting to fix {len(errors)} compilation error(s)...")
+        
+        # Resolve mechanical errors locally, only the rest needs the AI
+        latex_code, errors = self._apply_local_fixes(latex_code, errors)
+        if not errors:
+            logger.info("✓ Fixed all errors without calling the AI service")
+            return latex_code
         
         # Format errors for AI
         error_description = self._format_errors(errors)
         
         # Create prompt for AI
-        prompt = f"""You are a LaTeX expert. The following LaTeX code has compilation errors.
-Please fix ALL the errors and return ONLY the corrected LaTeX code.
-
-{error_description}
-
-ORIGINAL LATEX CODE:
-```latex
-{latex_code}
-```
-
-Instructions:
-- Fix ALL compilation errors
-- Preserve the original content and meaning
-- Return ONLY the corrected LaTeX code
-- Do NOT include explanations or comments
-- Do NOT wrap the output in markdown code blocks
-- Ensure all math environments are properly closed
-- Check for missing packages, undefined commands, or syntax errors
-
-CORRECTED LATEX CODE:"""
+        prompt = FIX_ERRORS_PROMPT.format(
+            error_description=error_description,
+            latex_code=latex_code
+        )
 
         # Call the appropriate AI service
-        fixed_code = self._call_ai_service(prompt)
+        return self._call_ai_service(prompt)
+    
+    def _apply_local_fixes(
+        self,
+        latex_code: str,
+        errors: List[Dict[str, str]]
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Apply the deterministic fixes from _LOCAL_FIXES
         
-        return fixed_code
+        Args:
+            latex_code: The LaTeX code with errors
+            errors: List of error dictionaries from LatexCompiler
+            
+        Returns:
+            Tuple of (updated LaTeX code, errors that still need fixing)
+        """
+        unresolved = []
+        fixed = 0
+        for error in errors:
+            message = error.get('message', '')
+            for pattern, fix in _LOCAL_FIXES:
+                match = pattern.search(message)
+                if match:
+                    new_code = fix(latex_code, match)
+                    if new_code is not None:
+                        latex_code = new_code
+                        fixed += 1
+                        break
+            else:
+                unresolved.append(error)
+        
+        if fixed:
+            logger.info(f"   Fixed {fixed} error(s) locally, {len(unresolved)} left for the AI service")
+        return latex_code, unresolved
+    
+    async def fix_errors_async(
+        self,
+        latex_code: str,
+        errors: List[Dict[str, str]],
+        max_fix_attempts: int = 2
+    ) -> str:
+        """
+        Fix LaTeX compilation errors without blocking the event loop
+        
+        The blocking API call runs on a worker thread; the cached client is
+        shared by all threads.
+        
+        Args:
+            latex_code: The LaTeX code with errors
+            errors: List of error dictionaries from LatexCompiler
+            max_fix_attempts: Maximum number of fix attempts
+            
+        Returns:
+            Fixed LaTeX code
+        """
+        return await asyncio.to_thread(self.fix_errors, latex_code, errors, max_fix_attempts)
+    
+    async def fix_errors_batch(
+        self,
+        items: Iterable[Tuple[str, List[Dict[str, str]]]],
+        max_concurrency: int = 4
+    ) -> List:
+        """
+        Fix several documents concurrently
+        
+        Args:
+            items: (latex_code, errors) pairs
+            max_concurrency: Maximum number of fixes in flight
+            
+        Returns:
+            List in the same order as items holding the fixed code for each
+            pair, or the exception raised while fixing it
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def fix_one(latex_code: str, errors: List[Dict[str, str]]) -> str:
+            async with semaphore:
+                return await self.fix_errors_async(latex_code, errors)
+        
+        return await asyncio.gather(
+            *(fix_one(code, errors) for code, errors in items),
+            return_exceptions=True
+        )
     
     def _format_errors(self, errors: List[Dict[str, str]]) -> str:
         """Format errors for AI prompt"""
         if not errors:
             return "No errors found."
         
-        error_text = f"COMPILATION ERRORS ({len(errors)} errors):\n"
+        parts = [f"COMPILATION ERRORS ({len(errors)} errors):\n"]
         for i, error in enumerate(errors, 1):
-            error_text += f"\nError {i}:\n"
-            error_text += f"  Line: {error.get('line', '?')}\n"
-            error_text += f"  Message: {error.get('message', 'Unknown error')}\n"
+            parts.append(
+                f"\nError {i}:\n"
+                f"  Line: {error.get('line', '?')}\n"
+                f"  Message: {error.get('message', 'Unknown error')}\n"
+            )
         
-        return error_text
+        return "".join(parts)
     
     def _call_ai_service(self, prompt: str) -> str:
         """
@@ -121,34 +304,65 @@ CORRECTED LATEX CODE:"""
         Returns:
             Fixed LaTeX code
         """
+        if self._backend_call is None:
+            raise ValueError(f"Unknown converter type: {self.converter_type}")
+        return self._backend_call(prompt)
+    
+    def _wait_for_rate_limit(self):
+        """Apply the rate limiter, one caller at a time"""
+        if self.rate_limiter:
+            with self._rate_limit_lock:
+                self.rate_limiter.wait_if_needed()
+    
+    def _get_client(self):
+        """
+        Create the client for the configured AI service on first use
+        
+        The client is cached so repeated fixes reuse its HTTP connections.
+        """
+        if self._client is not None:
+            return self._client
+        
         if self.converter_type == 'gemini':
-            return self._call_gemini(prompt)
+            try:
+                from google import genai
+            except ImportError:
+                raise ImportError(
+                    "google-genai not installed. Install with: pip install google-genai"
+                )
+            self._client = genai.Client(api_key=self.api_key)
         elif self.converter_type == 'openai':
-            return self._call_openai(prompt)
+            try:
+                from openai import OpenAI
+            except ImportError:
+                raise ImportError(
+                    "openai not installed. Install with: pip install openai"
+                )
+            self._client = OpenAI(api_key=self.api_key)
         elif self.converter_type == 'anthropic':
-            return self._call_anthropic(prompt)
+            try:
+                from anthropic import Anthropic
+            except ImportError:
+                raise ImportError(
+                    "anthropic not installed. Install with: pip install anthropic"
+                )
+            self._client = Anthropic(api_key=self.api_key)
         else:
             raise ValueError(f"Unknown converter type: {self.converter_type}")
+        
+        return self._client
     
     def _call_gemini(self, prompt: str) -> str:
         """Call Gemini API to fix LaTeX"""
-        try:
-            from google import genai
-        except ImportError:
-            raise ImportError(
-                "google-genai not installed. Install with: pip install google-genai"
-            )
-        
-        client = genai.Client(api_key=self.api_key)
+        client = self._get_client()
         
         # Retry logic
         last_exception = None
         for attempt in range(1, self.max_retries + 1):
             try:
-                if self.rate_limiter:
-                    self.rate_limiter.wait_if_needed()
+                self._wait_for_rate_limit()
                 
-                print(f"   Calling Gemini API (attempt {attempt}/{self.max_retries})...")
+                logger.info(f"   Calling Gemini API (attempt {attempt}/{self.max_retries})...")
                 
                 response = client.models.generate_content(
                     model=self.model,
@@ -158,19 +372,19 @@ CORRECTED LATEX CODE:"""
                 fixed_code = response.text
                 fixed_code = self._clean_response(fixed_code)
                 
-                print(f"✓ Successfully received fixed code from Gemini")
+                logger.info(f"✓ Successfully received fixed code from Gemini")
                 return fixed_code
                 
             except Exception as e:
                 last_exception = e
-                print(f"⚠️ Attempt {attempt} failed: {str(e)}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {str(e)}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed")
+                    logger.error(f"❌ All {self.max_retries} attempts failed")
                     raise Exception(
                         f"Failed to fix LaTeX after {self.max_retries} attempts: {str(e)}"
                     ) from last_exception
@@ -179,23 +393,15 @@ CORRECTED LATEX CODE:"""
     
     def _call_openai(self, prompt: str) -> str:
         """Call OpenAI API to fix LaTeX"""
-        try:
-            from openai import OpenAI
-        except ImportError:
-            raise ImportError(
-                "openai not installed. Install with: pip install openai"
-            )
-        
-        client = OpenAI(api_key=self.api_key)
+        client = self._get_client()
         
         # Retry logic
         last_exception = None
         for attempt in range(1, self.max_retries + 1):
             try:
-                if self.rate_limiter:
-                    self.rate_limiter.wait_if_needed()
+                self._wait_for_rate_limit()
                 
-                print(f"   Calling OpenAI API (attempt {attempt}/{self.max_retries})...")
+                logger.info(f"   Calling OpenAI API (attempt {attempt}/{self.max_retries})...")
                 
                 response = client.chat.completions.create(
                     model=self.model,
@@ -209,19 +415,19 @@ CORRECTED LATEX CODE:"""
                 fixed_code = response.choices[0].message.content
                 fixed_code = self._clean_response(fixed_code)
                 
-                print(f"✓ Successfully received fixed code from OpenAI")
+                logger.info(f"✓ Successfully received fixed code from OpenAI")
                 return fixed_code
                 
             except Exception as e:
                 last_exception = e
-                print(f"⚠️ Attempt {attempt} failed: {str(e)}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {str(e)}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed")
+                    logger.error(f"❌ All {self.max_retries} attempts failed")
                     raise Exception(
                         f"Failed to fix LaTeX after {self.max_retries} attempts: {str(e)}"
                     ) from last_exception
@@ -230,23 +436,15 @@ CORRECTED LATEX CODE:"""
     
     def _call_anthropic(self, prompt: str) -> str:
         """Call Anthropic API to fix LaTeX"""
-        try:
-            from anthropic import Anthropic
-        except ImportError:
-            raise ImportError(
-                "anthropic not installed. Install with: pip install anthropic"
-            )
-        
-        client = Anthropic(api_key=self.api_key)
+        client = self._get_client()
         
         # Retry logic
         last_exception = None
         for attempt in range(1, self.max_retries + 1):
             try:
-                if self.rate_limiter:
-                    self.rate_limiter.wait_if_needed()
+                self._wait_for_rate_limit()
                 
-                print(f"   Calling Anthropic API (attempt {attempt}/{self.max_retries})...")
+                logger.info(f"   Calling Anthropic API (attempt {attempt}/{self.max_retries})...")
                 
                 response = client.messages.create(
                     model=self.model,
@@ -260,19 +458,19 @@ CORRECTED LATEX CODE:"""
                 fixed_code = response.content[0].text
                 fixed_code = self._clean_response(fixed_code)
                 
-                print(f"✓ Successfully received fixed code from Anthropic")
+                logger.info(f"✓ Successfully received fixed code from Anthropic")
                 return fixed_code
                 
             except Exception as e:
                 last_exception = e
-                print(f"⚠️ Attempt {attempt} failed: {str(e)}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {str(e)}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed")
+                    logger.error(f"❌ All {self.max_retries} attempts failed")
                     raise Exception(
                         f"Failed to fix LaTeX after {self.max_retries} attempts: {str(e)}"
                     ) from last_exception
@@ -282,20 +480,14 @@ CORRECTED LATEX CODE:"""
     def _clean_response(self, text: str) -> str:
         """Remove markdown code blocks and extra formatting"""
         # Remove ```latex ... ``` blocks
-        text = re.sub(r'```latex\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
+        text = _RE_FENCE.sub('', text)
         
         # Remove common AI response prefixes
-        text = re.sub(r'^(Here is the corrected|Here\'s the fixed|Corrected).*?:\s*', '', text, flags=re.IGNORECASE | re.MULTILINE)
+        text = _RE_AI_PREFIX.sub('', text)
         
         # Remove document class and preamble if present (should only return content)
-        text = re.sub(
-            r'\\documentclass.*?\\begin\{document\}',
-            '',
-            text,
-            flags=re.DOTALL | re.IGNORECASE
-        )
+        text = _RE_PREAMBLE.sub('', text)
         # Remove \end{document} tags
-        text = re.sub(r'\\end\{document\}', '', text, flags=re.IGNORECASE)
+        text = _RE_END_DOCUMENT.sub('', text)
         
         return text.strip()
@@ -4,11 +4,34 @@ Uses OpenAI's GPT-4o/GPT-4o-mini models to convert handwritten notes to LaTeX
 """
 import os
 import re
+import logging
 import time
+import mmap
 import base64
+import asyncio
 from typing import Optional
 
-from .base import ImageToLatexConverterBase
+from ..utils.backoff import backoff_delay
+from .base import ImageToLatexConverterBase, ConcurrentConversionMixin
+from ._prompts import DEFAULT_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Matches opening ```latex and closing ``` markdown fences in one pass
+_RE_FENCE = re.compile(r'```(?:latex)?\s*')
+
+_MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp'
+}
+
+
+def _mime_for(path: str) -> str:
+    """Determine image mime type from file extension, defaulting to PNG"""
+    return _MIME_TYPES.get(path[path.rfind('.'):].lower(), 'image/png')
 
 
 class OpenAIImageToLatexConverter(ImageToLatexConverterBase):
@@ -40,61 +63,46 @@ class OpenAIImageToLatexConverter(ImageToLatexConverterBase):
         self.timeout = timeout
         self.retry_delay = retry_delay
         self.rate_limiter = rate_limiter
+        self._client = None
         
-    def convert(self, image_path: str, custom_prompt: Optional[str] = None) -> str:
+    def _get_client(self):
+        """Create the OpenAI client on first use so its connection pool is reused"""
+        if self._client is None:
+            try:
+                from openai import OpenAI
+            except ImportError:
+                raise ImportError(
+                    "openai not installed. Install with: pip install openai"
+                )
+            self._client = OpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout
+            )
+        return self._client
+    
+    def convert(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
         """
         Convert image of handwritten notes to LaTeX with retry logic and rate limiting
         
         Args:
             image_path: Path to image file
             custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
             
         Returns:
             LaTeX code as string
         """
-        try:
-            from openai import OpenAI, AuthenticationError, RateLimitError, Timeout
-        except ImportError:
-            raise ImportError(
-                "openai not installed. Install with: pip install openai"
-            )
+        client = self._get_client()
+        from openai import AuthenticationError, RateLimitError, Timeout
         
-        # Create OpenAI client
-        client = OpenAI(
-            api_key=self.api_key,
-            timeout=self.timeout
-        )
+        image_url = self._image_data_url(image_path, mime_type)
         
-        # Read and encode image to base64
-        with open(image_path, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
-        
-        # Determine image mime type from file extension
-        ext = os.path.splitext(image_path)[1].lower()
-        mime_type_map = {
-            '.png': 'image/png',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp'
-        }
-        mime_type = mime_type_map.get(ext, 'image/png')
-        
-        # Default prompt
-        if custom_prompt is None:
-            prompt = """Convert this handwritten mathematical content to LaTeX code.
-
-Instructions:
-- Output ONLY the LaTeX code, no explanations
-- Use proper LaTeX math environments (equation, align, etc.)
-- For inline math use $...$, for display math use $$...$$ or equation environments
-- Preserve the structure and organization of the content
-- If there are sections or titles, use appropriate LaTeX commands
-- Be precise with mathematical notation
-
-Output only the LaTeX code."""
-        else:
-            prompt = custom_prompt
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
         
         # Retry logic
         last_exception = None
@@ -102,12 +110,13 @@ Output only the LaTeX code."""
             try:
                 # Apply rate limiting before making request
                 if self.rate_limiter:
-                    status = self.rate_limiter.get_status()
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})")
-                    print(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
+                    logger.info(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})")
+                    if logger.isEnabledFor(logging.INFO):
+                        status = self.rate_limiter.get_status()
+                        logger.info(f"   Rate limit: {status['requests_made']}/{status['max_requests']} requests used in last {status['window_seconds']}s")
                     self.rate_limiter.wait_if_needed()
                 else:
-                    print(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    logger.info(f"🔄 Converting {os.path.basename(image_path)} to LaTeX (attempt {attempt}/{self.max_retries})...")
                 
                 # Create chat completion with vision
                 response = client.chat.completions.create(
@@ -123,7 +132,7 @@ Output only the LaTeX code."""
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:{mime_type};base64,{image_data}"
+                                        "url": image_url
                                     }
                                 }
                             ]
@@ -137,37 +146,37 @@ Output only the LaTeX code."""
                 # Clean up markdown code blocks if present
                 latex_code = self._clean_response(latex_code)
                 
-                print(f"✓ Successfully converted {os.path.basename(image_path)}")
+                logger.info(f"✓ Successfully converted {os.path.basename(image_path)}")
                 return latex_code
                 
             except AuthenticationError as e:
-                print(f"❌ API key invalid: {e}")
+                logger.error(f"❌ API key invalid: {e}")
                 raise
                 
             except RateLimitError as e:
                 last_exception = e
-                print(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
+                logger.warning(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
                     raise Exception(
                         f"Failed to convert {image_path} after {self.max_retries} attempts: Rate limit exceeded"
                     ) from last_exception
                     
             except Timeout as e:
                 last_exception = e
-                print(f"⚠️ Request timeout on attempt {attempt}: {e}")
+                logger.warning(f"⚠️ Request timeout on attempt {attempt}: {e}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
                     raise Exception(
                         f"Failed to convert {image_path} after {self.max_retries} attempts: Timeout"
                     ) from last_exception
@@ -176,14 +185,14 @@ Output only the LaTeX code."""
                 last_exception = e
                 error_msg = str(e)
                 
-                print(f"⚠️ Attempt {attempt} failed: {error_msg}")
+                logger.warning(f"⚠️ Attempt {attempt} failed: {error_msg}")
                 
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt  # Exponential backoff
-                    print(f"   Retrying in {wait_time} seconds...")
+                    wait_time = backoff_delay(self.retry_delay, attempt, e)
+                    logger.info(f"   Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
+                    logger.error(f"❌ All {self.max_retries} attempts failed for {os.path.basename(image_path)}")
                     raise Exception(
                         f"Failed to convert {image_path} after {self.max_retries} attempts: {error_msg}"
                     ) from last_exception
@@ -191,12 +200,178 @@ Output only the LaTeX code."""
         # Should never reach here, but just in case
         raise last_exception
     
+    def _image_data_url(self, image_path: str, mime_type: Optional[str] = None) -> str:
+        """Read an image and return it as a base64 data URL"""
+        # Encode straight from a read-only mapping of the file, the raw bytes
+        # are never copied into a Python object; ASCII decode is the fast path
+        with open(image_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                image_data = ""
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    image_data = base64.b64encode(mm).decode('ascii')
+        
+        return f"data:{mime_type or _mime_for(image_path)};base64,{image_data}"
+    
     def _clean_response(self, text: str) -> str:
         """Remove markdown code blocks and extra formatting"""
         if text is None:
             return ""
         
         # Remove ```latex ... ``` blocks
-        text = re.sub(r'```latex\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
-        return text.strip()
\ No newline at end of file
+        return _RE_FENCE.sub('', text).strip()
+
+
+class AsyncOpenAIImageToLatexConverter(OpenAIImageToLatexConverter, ConcurrentConversionMixin):
+    """
+    OpenAI converter that fans out many pages concurrently
+    
+    Uses openai.AsyncOpenAI with at most `max_in_flight` requests in flight.
+    The synchronous convert() inherited from the parent is still available.
+    """
+    
+    def __init__(
+        self, 
+        api_key: str, 
+        model: str = "gpt-4o-mini",
+        max_retries: int = 3,
+        timeout: int = 120,
+        retry_delay: int = 5,
+        rate_limiter: Optional[object] = None,
+        max_in_flight: int = 4
+    ):
+        """
+        Initialize async OpenAI converter
+        
+        Args:
+            api_key: OpenAI API key
+            model: Model name to use (gpt-4o or gpt-4o-mini)
+            max_retries: Maximum number of retry attempts
+            timeout: Timeout in seconds for API calls
+            retry_delay: Base delay between retries (exponential backoff)
+            rate_limiter: Optional rate limiter instance
+            max_in_flight: Maximum number of concurrent API requests
+        """
+        super().__init__(
+            api_key=api_key,
+            model=model,
+            max_retries=max_retries,
+            timeout=timeout,
+            retry_delay=retry_delay,
+            rate_limiter=rate_limiter
+        )
+        self.max_in_flight = max(1, max_in_flight)
+        self._async_client = None
+    
+    def _on_new_loop(self):
+        """The async client's connections belong to the previous loop"""
+        self._async_client = None
+    
+    async def aclose(self):
+        """Close the async client's connection pool while its event loop still runs"""
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.close()
+    
+    async def convert_async(
+        self,
+        image_path: str,
+        custom_prompt: Optional[str] = None,
+        mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Convert a single image while holding a slot of the concurrency semaphore
+        
+        Args:
+            image_path: Path to image file
+            custom_prompt: Optional custom prompt for conversion
+            mime_type: MIME type of the image, detected from the extension if omitted
+            
+        Returns:
+            LaTeX code as string
+        """
+        try:
+            from openai import AsyncOpenAI, AuthenticationError, RateLimitError, Timeout
+        except ImportError:
+            raise ImportError(
+                "openai not installed. Install with: pip install openai"
+            )
+        
+        self._bind_to_running_loop()
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout
+            )
+        
+        prompt = DEFAULT_PROMPT if custom_prompt is None else custom_prompt
+        name = os.path.basename(image_path)
+        
+        async with self._semaphore:
+            # Encode inside the semaphore so only in-flight images are held in memory
+            image_url = self._image_data_url(image_path, mime_type)
+            
+            # Retry logic
+            last_exception = None
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    logger.info(f"🔄 Converting {name} to LaTeX (attempt {attempt}/{self.max_retries})...")
+                    await self._wait_for_rate_limit()
+                    
+                    # Create chat completion with vision
+                    response = await self._async_client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [
+                                    {
+                                        "type": "text",
+                                        "text": prompt
+                                    },
+                                    {
+                                        "type": "image_url",
+                                        "image_url": {
+                                            "url": image_url
+                                        }
+                                    }
+                                ]
+                            }
+                        ],
+                        max_tokens=4096
+                    )
+                    
+                    # Clean up markdown code blocks if present
+                    latex_code = self._clean_response(response.choices[0].message.content)
+                    
+                    logger.info(f"✓ Successfully converted {name}")
+                    return latex_code
+                    
+                except AuthenticationError as e:
+                    logger.error(f"❌ API key invalid: {e}")
+                    raise
+                    
+                except Exception as e:
+                    last_exception = e
+                    if isinstance(e, RateLimitError):
+                        reason = "Rate limit exceeded"
+                        logger.warning(f"⚠️ Rate limit hit on attempt {attempt}: {e}")
+                    elif isinstance(e, Timeout):
+                        reason = "Timeout"
+                        logger.warning(f"⚠️ Request timeout on attempt {attempt}: {e}")
+                    else:
+                        reason = str(e)
+                        logger.warning(f"⚠️ Attempt {attempt} failed: {reason}")
+                    
+                    if attempt < self.max_retries:
+                        wait_time = backoff_delay(self.retry_delay, attempt, e)
+                        logger.info(f"   Retrying in {wait_time:.1f} seconds...")
+                        await asyncio.sleep(wait_time)
+                    else:
+                        logger.error(f"❌ All {self.max_retries} attempts failed for {name}")
+                        raise Exception(
+                            f"Failed to convert {image_path} after {self.max_retries} attempts: {reason}"
+                        ) from last_exception
+            
+            # Should never reach here, but just in case
+            raise last_exception
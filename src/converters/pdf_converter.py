@@ -4,46 +4,461 @@ Converts PDF pages to images with optional change detection
 """
 
 import os
+import io
+import logging
+import hashlib
+import tempfile
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, Iterator
+import numpy as np
 from PIL import Image
 import concurrent.futures
-from threading import Lock
 
 from .base import PDFToImageConverterBase
 from ..utils.image_diff import ImageDiff
 
+# Optional dependencies, probed once at import time
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    from pdf2image import convert_from_path
+except ImportError:
+    convert_from_path = None
+
+try:
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import IndirectObject, DictionaryObject, ArrayObject, StreamObject
+except ImportError:
+    PdfReader = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache of the open pypdfium2 document: (path, mtime) -> PdfDocument
+_pdfium_doc = None
+_pdfium_key = None
+
+
+def _open_pdfium(pdf_path: str):
+    """
+    Open a PDF with pypdfium2, reusing the document already open in this process
+    
+    Each worker parses the PDF once and then renders all of its pages from the
+    same document instead of re-reading the file for every page.
+    
+    Args:
+        pdf_path: Path to PDF file
+        
+    Returns:
+        pypdfium2.PdfDocument
+    """
+    global _pdfium_doc, _pdfium_key
+
+    key = (pdf_path, os.path.getmtime(pdf_path))
+    if _pdfium_key != key:
+        if _pdfium_doc is not None:
+            _pdfium_doc.close()
+        _pdfium_doc = pdfium.PdfDocument(pdf_path)
+        _pdfium_key = key
+    return _pdfium_doc
+
+
+def _count_pages(pdf_path: str) -> int:
+    """
+    Count the pages of a PDF
+    
+    Uses pypdfium2 when installed, otherwise falls back to PyPDF2.
+    
+    Args:
+        pdf_path: Path to PDF file
+        
+    Returns:
+        Number of pages
+    """
+    if pdfium is not None:
+        # Not cached: forked workers must not inherit an open PDFium document
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    if PdfReader is None:
+        raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
+    reader = PdfReader(pdf_path)
+    num_pages = len(reader.pages)
+    # Explicitly release the reader object to help unload the PDF from memory
+    del reader
+    return num_pages
+
+
+def _hash_pdf_object(obj, digest) -> None:
+    """
+    Feed a PDF object and everything it references into a hash
+    
+    Walks the object graph with an explicit stack, so deeply nested objects
+    cannot exhaust the recursion limit, and hashes each indirect object once
+    to stop on reference cycles. Streams contribute their raw (still encoded)
+    bytes; nothing is decompressed.
+    
+    Args:
+        obj: PyPDF2 object (indirect references are resolved)
+        digest: hashlib object to update
+    """
+    seen = set()
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, bytes):
+            digest.update(obj)
+            continue
+        if isinstance(obj, IndirectObject):
+            if obj.idnum in seen:
+                digest.update(b'R%d' % obj.idnum)
+                continue
+            seen.add(obj.idnum)
+            obj = obj.get_object()
+
+        if isinstance(obj, DictionaryObject):
+            if isinstance(obj, StreamObject):
+                stack.append(obj._data)
+            for key in sorted(obj, reverse=True):
+                if key != '/Parent':
+                    stack.append(obj[key])
+                    stack.append(key.encode())
+        elif isinstance(obj, ArrayObject):
+            stack.extend(reversed(obj))
+        else:
+            digest.update(repr(obj).encode())
+
+
+def _page_content_hashes(pdf_path: str, dpi: int) -> Optional[List[str]]:
+    """
+    Hash the source of every PDF page
+    
+    Covers each page's content streams and resources (fonts, images, forms)
+    and the render resolution, so a page with the same hash renders to the
+    same image.
+    
+    Args:
+        pdf_path: Path to PDF file
+        dpi: Render resolution the pages are rasterized at
+        
+    Returns:
+        List of hex digests in page order, or None if PyPDF2 is not installed
+        or the PDF could not be parsed
+    """
+    if PdfReader is None:
+        return None
+
+    try:
+        reader = PdfReader(pdf_path)
+        hashes = []
+        for page in reader.pages:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(b'dpi%d' % dpi)
+            for key in ('/Contents', '/Resources', '/MediaBox', '/CropBox', '/Rotate'):
+                if key in page:
+                    digest.update(key.encode())
+                    _hash_pdf_object(page[key], digest)
+            hashes.append(digest.hexdigest())
+    except Exception as e:
+        logger.warning(f"⚠️ Could not hash page sources, rendering all pages: {e}")
+        return None
+    return hashes
+
+
+def _rasterize(pdf_path: str, page_num: int, dpi: int) -> Tuple[Optional[np.ndarray], object]:
+    """
+    Rasterize a single PDF page to an RGB array
+    
+    pypdfium2 renders in-process from the cached document straight into a
+    bitmap that is viewed as a numpy array, with no PIL image in between;
+    pdf2image is the fallback and spawns one pdftoppm call for the page.
+    
+    Args:
+        pdf_path: Path to PDF file
+        page_num: Page number (1-based)
+        dpi: Render resolution
+        
+    Returns:
+        Tuple of (array of shape (h, w, 3), or None if the page could not be
+        rendered; object owning the array's memory, to keep alive while it is used)
+    """
+    if pdfium is not None:
+        page = _open_pdfium(pdf_path)[page_num - 1]
+        try:
+            bitmap = page.render(scale=dpi / 72, rev_byteorder=True)
+        finally:
+            page.close()
+        return bitmap.to_numpy(), bitmap
+
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+    if not images:
+        return None, None
+    with images[0] as image:
+        return np.asarray(image.convert('RGB')), None
+
+
+def _save_png(pixels: np.ndarray, image_path: str, tile_hashes: Optional[List[str]] = None) -> Dict:
+    """
+    Save a page image as PNG and digest it on the way out
+    
+    Uses OpenCV's encoder at compression level 1 when cv2 is installed, which is
+    much faster than Pillow's for multi-megapixel pages; otherwise uses Pillow,
+    also at zlib level 1. Page images are intermediates, so size matters less
+    than encode time. The image is encoded in memory, so the bytes written and
+    the pixels already at hand are hashed without reading the file back.
+    
+    Args:
+        pixels: RGB array of shape (h, w, 3)
+        image_path: Destination path
+        tile_hashes: The pixels' tile hashes, if the caller already computed them
+        
+    Returns:
+        Dict with the file's 'image_hash' (blake2b hex, 16 bytes) and the
+        pixels' 'tile_hashes' (see ImageDiff.tile_hashes)
+    """
+    encoded = None
+    if cv2 is not None:
+        ok, buffer = cv2.imencode(
+            '.png', cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        )
+        if ok:
+            encoded = buffer.data
+    if encoded is None:
+        stream = io.BytesIO()
+        Image.fromarray(pixels).save(stream, 'PNG', compress_level=1, optimize=False)
+        encoded = stream.getbuffer()
+    with open(image_path, 'wb') as f:
+        f.write(encoded)
+    return {
+        'image_hash': hashlib.blake2b(encoded, digest_size=16).hexdigest(),
+        'tile_hashes': tile_hashes or ImageDiff.tile_hashes(pixels)
+    }
+
+
+def _load_pixels(image_path: str) -> np.ndarray:
+    """
+    Decode a page image straight into an RGB numpy array
+    
+    Uses cv2.imdecode on the raw file bytes when OpenCV is installed, which is
+    faster than Pillow and leaves no PIL image alive; otherwise uses Pillow.
+    
+    Args:
+        image_path: Path to the PNG
+        
+    Returns:
+        Array of shape (h, w, 3)
+    """
+    if cv2 is not None:
+        raw = np.fromfile(image_path, np.uint8)
+        arr = cv2.imdecode(raw, cv2.IMREAD_COLOR)
+        del raw
+        if arr is not None:
+            return cv2.cvtColor(arr, cv2.COLOR_BGR2RGB)
+    with Image.open(image_path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def _render_page(job: Tuple) -> Tuple[int, Optional[str], int, Dict, List[Tuple[int, str]], Optional[Dict]]:
+    """
+    Render one PDF page and save it, bumping its version if it changed
+    
+    Called by _render_block inside a worker process. The page is handled as a
+    numpy array from render to diff to save.
+    Pages whose tile hashes all match the saved image's are pixel-for-pixel
+    identical to it and are treated as unchanged without running ImageDiff;
+    the saved image's hashes come from the checkpoint, so it isn't even
+    reopened. Any other page goes through ImageDiff.
+    
+    Args:
+        job: Tuple of (pdf_path, page_num, dpi, output_dir, pdf_name,
+             current_version, enable_diff_check, rendered_path, saved_tiles).
+             rendered_path points to an image pdftoppm already produced for the
+             page, or is None to rasterize the page here. saved_tiles is the
+             list of tile hashes of the saved image recorded in the checkpoint,
+             if any
+        
+    Returns:
+        Tuple of (page_num, image_path or None if nothing was rendered,
+        image_version, checkpoint fields to store for the page,
+        list of (log level, message) to log, digests of the image if it
+        was written (see _save_png) or None)
+    """
+    (pdf_path, i, dpi, output_dir, pdf_name, current_version,
+     enable_diff_check, rendered_path, saved_tiles) = job
+
+    # Messages are handed back to the parent to log; worker processes
+    # don't share the parent's logging queue
+    log: List[Tuple[int, str]] = []
+    digests = None
+    if rendered_path:
+        pixels, owner = _load_pixels(rendered_path), None
+    else:
+        pixels, owner = _rasterize(pdf_path, i, dpi)
+    if pixels is None:
+        return i, None, current_version, {}, log, None
+    image_path = os.path.join(output_dir, f"{pdf_name}_page{i}.png")
+    new_tiles = ImageDiff.tile_hashes(pixels)
+    kept_tiles = new_tiles
+    # Check if image already exists and if diff checking is enabled
+    if enable_diff_check and os.path.exists(image_path):
+        if saved_tiles == new_tiles:
+            log.append((logging.INFO, f"✓ Page {i} unchanged - version {current_version}"))
+            version = current_version
+        else:
+            old_pixels = _load_pixels(image_path)
+            clusters = []
+            if old_pixels.shape != pixels.shape:
+                # Rendered at another size (e.g. a new DPI): there is nothing to diff
+                change = "changed size"
+            else:
+                coarse = ImageDiff.coarse_change_count(old_pixels, pixels) if cv2 is not None else 0
+                if coarse > 2:
+                    # Clearly changed even on the downscaled pages. The coarse check
+                    # misses thin strokes, so it never declares a page unchanged
+                    change = f"has {coarse} changed regions"
+                else:
+                    clusters = ImageDiff(old_pixels, pixels).run()
+                    change = f"has {len(clusters)} changes detected" if len(clusters) > 2 else None
+            if change:
+                version = current_version + 1
+                log.append((logging.WARNING, f"⚠️ Page {i} {change} - updating (v{current_version} → v{version})"))
+                digests = _save_png(pixels, image_path, new_tiles)
+                log.append((logging.INFO, f"✓ Updated page {i} to version {version}"))
+            else:
+                if clusters:
+                    log.append((logging.INFO, f"✓ Page {i} has {len(clusters)} minor changes - keeping version {current_version}"))
+                else:
+                    log.append((logging.INFO, f"✓ Page {i} unchanged - version {current_version}"))
+                version = current_version
+                # The saved image stays on disk, so its hashes are the ones to keep
+                kept_tiles = saved_tiles or ImageDiff.tile_hashes(old_pixels)
+            del old_pixels
+    else:
+        version = 1
+        digests = _save_png(pixels, image_path, new_tiles)
+        log.append((logging.INFO, f"✓ Saved page {i} as version {version}"))
+    del pixels, owner
+    return i, image_path, version, {'image_tiles': kept_tiles}, log, digests
+
+
+def _render_block(job: Tuple) -> List[Tuple[int, Optional[str], int, Dict, List[Tuple[int, str]], Optional[Dict]]]:
+    """
+    Render a block of PDF pages in one worker call
+    
+    Runs in a worker process, so it must stay a picklable module-level function.
+    With pdf2image the whole block is rasterized by a single pdftoppm run;
+    with pypdfium2 the pages are rendered from the worker's cached document.
+    
+    Args:
+        job: Tuple of (pdf_path, dpi, output_dir, pdf_name, enable_diff_check,
+             pages), where pages is a list of (page_num, current_version,
+             saved_tiles) in ascending page order
+        
+    Returns:
+        List of _render_page results, one per page
+    """
+    pdf_path, dpi, output_dir, pdf_name, enable_diff_check, pages = job
+
+    with tempfile.TemporaryDirectory(prefix="pdf_render_") as tmpdir:
+        rendered: List[str] = []
+        first_page = pages[0][0]
+        if pdfium is None:
+            rendered = convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                first_page=first_page,
+                last_page=pages[-1][0],
+                thread_count=1,
+                output_folder=tmpdir,
+                paths_only=True,
+                fmt='png'
+            )
+
+        results = []
+        for i, current_version, saved_tiles in pages:
+            offset = i - first_page
+            rendered_path = rendered[offset] if offset < len(rendered) else None
+            results.append(_render_page((pdf_path, i, dpi, output_dir, pdf_name, current_version,
+                                         enable_diff_check, rendered_path, saved_tiles)))
+        return results
+
 
 class PDFToImageConverter(PDFToImageConverterBase):
 
     """Converts PDF pages to images with optional re-extraction for changed pages"""
     
-    def __init__(self, dpi: int = 300, enable_diff_check: bool = True):
+    def __init__(self, dpi: int = 300, enable_diff_check: bool = True, num_workers: Optional[int] = None):
         """
         Initialize PDF converter
         
         Args:
             dpi: DPI resolution for image extraction
             enable_diff_check: Whether to detect changes in existing images
+            num_workers: Upper bound on worker processes used for rasterization
+                         (defaults to cpu_count)
         """
+        super().__init__()
         self.dpi = dpi
         self.enable_diff_check = enable_diff_check
+        self.num_workers = num_workers or os.cpu_count() or 1
+
+    def _get_max_workers(self, num_jobs: int) -> int:
+        """
+        Size the process pool for a batch of pages
+        
+        Rendering, PNG encoding and diffing are CPU-bound, so there is no point in
+        more processes than cores or than pages to render.
+        
+        Args:
+            num_jobs: Number of pages to render
+            
+        Returns:
+            Number of worker processes to start
+        """
+        return max(1, min(self.num_workers, os.cpu_count() or 1, num_jobs))
+        
+    def source_fingerprint(self, pdf_path: str, head_size: int = 1 << 20) -> Dict:
+        """
+        Fingerprint of a PDF file and of the settings its pages are rendered with
         
+        Saved images only stand for the PDF at the resolution and diff mode
+        they were produced with, so those are part of the fingerprint too.
+        
+        Args:
+            pdf_path: Path to PDF file
+            head_size: Number of leading bytes to hash
+            
+        Returns:
+            Dict of checkpoint fields (source_size, source_mtime_ns,
+            source_head_hash, render_dpi, render_diff_check)
+        """
+        fingerprint = super().source_fingerprint(pdf_path, head_size)
+        fingerprint['render_dpi'] = self.dpi
+        fingerprint['render_diff_check'] = self.enable_diff_check
+        return fingerprint
+
     def get_pdf_pages(self, pdf_path: str):
         """
         Returns an iterator over page numbers (1-based) for the given PDF file.
-        Caches the result in the object for future reference.
+        Caches the result in the object for future reference, so asking again for
+        the same unmodified file doesn't re-parse it.
         """
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(pdf_path)
-            num_pages = len(reader.pages)
-        except ImportError:
-            raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
+        mtime = os.path.getmtime(pdf_path)
+        if getattr(self, '_last_pdf_path', None) == pdf_path and self._last_pdf_mtime == mtime:
+            return iter(self._last_pdf_pages)
+        num_pages = _count_pages(pdf_path)
         self._last_pdf_path = pdf_path
+        self._last_pdf_mtime = mtime
         self._last_pdf_pages = list(range(1, num_pages + 1))
-        # Explicitly release the reader object to help unload the PDF from memory
-        del reader
         return iter(self._last_pdf_pages)
         
     def convert(
@@ -63,86 +478,162 @@ class PDFToImageConverter(PDFToImageConverterBase):
         Returns:
             Tuple of (list of image file paths, dict mapping page_num -> image_version)
         """
-        try:
-            from pdf2image import convert_from_path
-        except ImportError:
+        # Pages arrive in completion order; slot them by page number instead of
+        # sorting. The page count comes from the pages themselves, so a PDF
+        # served from the checkpoint is never opened
+        results: Dict[int, Tuple[str, int]] = {}
+        for page_num, image_path, version in self.iter_pages(pdf_path, output_dir, checkpoint):
+            results[page_num] = (image_path, version)
+
+        page_nums = [i for i in range(1, max(results, default=0) + 1) if i in results]
+        image_paths = [results[i][0] for i in page_nums]
+        image_versions = {i: results[i][1] for i in page_nums}  # page_num -> version
+        return image_paths, image_versions
+
+    def _pages_from_checkpoint(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        pdf_name: str,
+        checkpoint: Optional[Dict]
+    ) -> Optional[List[Tuple[int, str, int]]]:
+        """
+        Reuse the checkpoint's pages if the PDF and the render settings are
+        unchanged since they were recorded
+        
+        Args:
+            pdf_path: Path to PDF file
+            output_dir: Directory holding the page images
+            pdf_name: Stem used in the image file names
+            checkpoint: Current checkpoint data
+            
+        Returns:
+            List of (page_num, image_path, image_version), or None if the PDF
+            (or one of its saved images) has to be looked at again
+        """
+        if not checkpoint or 'source_head_hash' not in checkpoint:
+            return None
+        fingerprint = self.source_fingerprint(pdf_path)
+        if any(checkpoint.get(key) != value for key, value in fingerprint.items()):
+            return None
+
+        # One directory scan instead of a stat per page
+        with os.scandir(output_dir) as entries:
+            existing = {entry.name for entry in entries}
+        pages = []
+        for page_entry in checkpoint.get('pages', []):
+            image_name = f"{pdf_name}_page{page_entry['page']}.png"
+            if not page_entry.get('image_version') or image_name not in existing:
+                return None
+            pages.append((page_entry['page'], f"{output_dir}/{image_name}", page_entry['image_version']))
+        return pages or None
+
+    def iter_pages(
+        self,
+        pdf_path: str,
+        output_dir: str = "output/images",
+        checkpoint: Optional[Dict] = None
+    ) -> Iterator[Tuple[int, str, int]]:
+        """
+        Render PDF pages in worker processes, yielding each page as soon as it is saved
+        
+        If the PDF's source_fingerprint() matches the one stored in the checkpoint,
+        the recorded pages are yielded without opening the PDF. Otherwise, with diff
+        checking enabled, pages whose source hash matches the checkpoint's
+        content_hash are yielded straight away with their saved image, without
+        rendering or diffing.
+        
+        Args:
+            pdf_path: Path to PDF file
+            output_dir: Directory to save images
+            checkpoint: Current checkpoint data for version tracking
+            
+        Yields:
+            Tuples of (page_num, image_path, image_version) in completion order
+        """
+        if pdfium is None and convert_from_path is None:
             raise ImportError(
-                "pdf2image not installed. Install with: pip install pdf2image\n"
-                "Also requires poppler: https://pdf2image.readthedocs.io/en/latest/installation.html"
+                "No PDF renderer installed. Install with: pip install pypdfium2\n"
+                "(or pip install pdf2image, which also requires poppler: "
+                "https://pdf2image.readthedocs.io/en/latest/installation.html)"
             )
         
+        self.page_metadata = {}
+        self.image_digests = {}
+
         # Create output directory
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Save images and track versions, processing one page at a time
-        image_paths = []
-        image_versions = {}  # page_num -> version
         pdf_name = Path(pdf_path).stem
 
+        # The PDF hasn't been touched since the checkpoint's last Stage 1 run,
+        # so its recorded image versions still hold
+        cached = self._pages_from_checkpoint(pdf_path, output_dir, pdf_name, checkpoint)
+        if cached is not None:
+            logger.info(f"✓ PDF unchanged since last run - reusing {len(cached)} page images")
+            yield from cached
+            return
+
         # Get number of pages in PDF
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(pdf_path)
-            num_pages = len(reader.pages)
-        except ImportError:
-            raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
-
-        # Thread-safe containers
-        lock = Lock()
-        image_paths_shared = []
-        image_versions_shared = {}
-
-        def process_page(i):
-            images = convert_from_path(pdf_path, dpi=self.dpi, first_page=i, last_page=i)
-            if not images:
-                return
-            image = images[0]
-            image_path = os.path.join(output_dir, f"{pdf_name}_page{i}.png")
+        self.get_pdf_pages(pdf_path)
+        num_pages = len(self._last_pdf_pages)
+
+        # Without diff checking every page is rendered and saved again, as before
+        content_hashes = _page_content_hashes(pdf_path, self.dpi) if self.enable_diff_check else None
+
+        # Index checkpoint entries once instead of scanning them for every page
+        entry_by_page: Dict[int, Dict] = {}
+        if checkpoint and 'pages' in checkpoint:
+            for page_entry in checkpoint['pages']:
+                entry_by_page.setdefault(page_entry['page'], page_entry)
+
+        pending = []
+        for i in range(1, num_pages + 1):
             # Get current version from checkpoint
-            current_version = 0
-            if checkpoint and 'pages' in checkpoint:
-                for page_entry in checkpoint['pages']:
-                    if page_entry['page'] == i:
-                        current_version = page_entry.get('image_version', 0)
-                        break
-            # Check if image already exists and if diff checking is enabled
-            if self.enable_diff_check and os.path.exists(image_path):
-                existing_image = Image.open(image_path)
-                diff_checker = ImageDiff(existing_image, image)
-                clusters = diff_checker.run()
-                if len(clusters) > 2:
-                    new_version = current_version + 1
-                    print(f"⚠️ Page {i} has {len(clusters)} changes detected - updating (v{current_version} → v{new_version})")
-                    image.save(image_path, 'PNG')
-                    print(f"✓ Updated page {i} to version {new_version}")
-                    with lock:
-                        image_paths_shared.append(image_path)
-                        image_versions_shared[i] = new_version
-                else:
-                    if clusters:
-                        print(f"✓ Page {i} has {len(clusters)} minor changes - keeping version {current_version}")
-                    else:
-                        print(f"✓ Page {i} unchanged - version {current_version}")
-                    with lock:
-                        image_paths_shared.append(image_path)
-                        image_versions_shared[i] = current_version
-                existing_image.close()
-                del existing_image
-            else:
-                new_version = 1
-                image.save(image_path, 'PNG')
-                print(f"✓ Saved page {i} as version {new_version}")
-                with lock:
-                    image_paths_shared.append(image_path)
-                    image_versions_shared[i] = new_version
-            image.close()
-            del image
-
-        # Use ThreadPoolExecutor to process pages in parallel
-        max_workers = min(4, num_pages)  # Limit number of threads
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            executor.map(process_page, range(1, num_pages + 1))
-        # Sort image_paths by page number
-        image_paths_sorted = [os.path.join(output_dir, f"{pdf_name}_page{i}.png") for i in sorted(image_versions_shared.keys())]
-        image_versions_sorted = {i: image_versions_shared[i] for i in sorted(image_versions_shared.keys())}
-        return image_paths_sorted, image_versions_sorted
+            page_entry = entry_by_page.get(i, {})
+            current_version = page_entry.get('image_version', 0)
+            saved_tiles = page_entry.get('image_tiles')
+            saved_content_hash = page_entry.get('content_hash')
+
+            if content_hashes:
+                self.page_metadata[i] = {'content_hash': content_hashes[i - 1]}
+                image_path = os.path.join(output_dir, f"{pdf_name}_page{i}.png")
+                # Same page source as the saved image: no need to render or diff it
+                if (current_version and saved_content_hash == content_hashes[i - 1]
+                        and os.path.exists(image_path)):
+                    logger.info(f"✓ Page {i} source unchanged - version {current_version}")
+                    yield i, image_path, current_version
+                    continue
+            pending.append((i, current_version, saved_tiles))
+
+        if not pending:
+            return
+
+        # Blocks of pages amortize worker start-up and PDF parsing over several
+        # pages while still leaving a few blocks per core for load balancing
+        chunk_size = max(1, len(pending) // (4 * (os.cpu_count() or 1)))
+        jobs = [
+            (pdf_path, self.dpi, output_dir, pdf_name, self.enable_diff_check,
+             pending[start:start + chunk_size])
+            for start in range(0, len(pending), chunk_size)
+        ]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self._get_max_workers(len(jobs))) as executor:
+            futures = [executor.submit(_render_block, job) for job in jobs]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    for page_num, image_path, version, fields, log, digests in future.result():
+                        for level, message in log:
+                            logger.log(level, message)
+                        if fields:
+                            self.page_metadata.setdefault(page_num, {}).update(fields)
+                        if digests:
+                            self.image_digests[page_num] = digests
+                        if image_path is not None:
+                            yield page_num, image_path, version
+            except BaseException:
+                # A failed block (or a consumer that stopped early) shouldn't wait
+                # for the rest of the PDF to render before the error surfaces
+                for future in futures:
+                    future.cancel()
+                raise
@@ -4,10 +4,10 @@ Implements dependency injection pattern
 """
 from typing import Optional
 from .converters.base import ImageToLatexConverterBase, PDFToImageConverterBase
-from .converters.gemini_converter import GeminiImageToLatexConverter
+from .converters.gemini_converter import GeminiImageToLatexConverter, AsyncGeminiImageToLatexConverter
 from .converters.dummy_converter import DummyImageToLatexConverter
-from .converters.openai_converter import OpenAIImageToLatexConverter
-from .converters.anthropic_converter import AnthropicImageToLatexConverter
+from .converters.openai_converter import OpenAIImageToLatexConverter, AsyncOpenAIImageToLatexConverter
+from .converters.anthropic_converter import AnthropicImageToLatexConverter, AsyncAnthropicImageToLatexConverter
 from .converters.pdf_converter import PDFToImageConverter
 from .utils.rate_limiter import RateLimiter
 
@@ -23,7 +23,8 @@ class ConverterFactory:
         max_retries: int = 3,
         timeout: int = 120,
         retry_delay: int = 5,
-        rate_limiter: Optional[RateLimiter] = None
+        rate_limiter: Optional[RateLimiter] = None,
+        max_in_flight: int = 1
     ) -> ImageToLatexConverterBase:
         """
         Create an image to LaTeX converter based on type
@@ -36,6 +37,7 @@ class ConverterFactory:
             timeout: Timeout in seconds
             retry_delay: Delay between retries
             rate_limiter: Optional rate limiter instance
+            max_in_flight: Concurrent requests (values > 1 select the async converter variant)
             
         Returns:
             ImageToLatexConverterBase instance
@@ -55,6 +57,17 @@ class ConverterFactory:
         elif converter_type == 'gemini':
             if not api_key:
                 raise ValueError("API key required for Gemini converter")
+            if max_in_flight > 1:
+                print(f"🤖 Using AsyncGeminiImageToLatexConverter (model: {model}, max in flight: {max_in_flight})")
+                return AsyncGeminiImageToLatexConverter(
+                    api_key=api_key,
+                    model=model,
+                    max_retries=max_retries,
+                    timeout=timeout,
+                    retry_delay=retry_delay,
+                    rate_limiter=rate_limiter,
+                    max_in_flight=max_in_flight
+                )
             print(f"🤖 Using GeminiImageToLatexConverter (model: {model})")
             return GeminiImageToLatexConverter(
                 api_key=api_key,
@@ -67,6 +80,17 @@ class ConverterFactory:
         elif converter_type == 'openai':
             if not api_key:
                 raise ValueError("API key required for OpenAI converter")
+            if max_in_flight > 1:
+                print(f"🤖 Using AsyncOpenAIImageToLatexConverter (model: {model}, max in flight: {max_in_flight})")
+                return AsyncOpenAIImageToLatexConverter(
+                    api_key=api_key,
+                    model=model,
+                    max_retries=max_retries,
+                    timeout=timeout,
+                    retry_delay=retry_delay,
+                    rate_limiter=rate_limiter,
+                    max_in_flight=max_in_flight
+                )
             print(f"🤖 Using OpenAIImageToLatexConverter (model: {model})")
             return OpenAIImageToLatexConverter(
                 api_key=api_key,
@@ -79,6 +103,17 @@ class ConverterFactory:
         elif converter_type == 'anthropic':
             if not api_key:
                 raise ValueError("API key required for Anthropic converter")
+            if max_in_flight > 1:
+                print(f"🤖 Using AsyncAnthropicImageToLatexConverter (model: {model}, max in flight: {max_in_flight})")
+                return AsyncAnthropicImageToLatexConverter(
+                    api_key=api_key,
+                    model=model,
+                    max_retries=max_retries,
+                    timeout=timeout,
+                    retry_delay=retry_delay,
+                    rate_limiter=rate_limiter,
+                    max_in_flight=max_in_flight
+                )
             print(f"🤖 Using AnthropicImageToLatexConverter (model: {model})")
             return AnthropicImageToLatexConverter(
                 api_key=api_key,
@@ -97,7 +132,8 @@ class ConverterFactory:
     @staticmethod
     def create_pdf_converter(
         dpi: int = 300,
-        enable_diff_check: bool = True
+        enable_diff_check: bool = True,
+        num_workers: Optional[int] = None
     ) -> PDFToImageConverterBase:
         """
         Create a PDF to image converter
@@ -105,13 +141,15 @@ class ConverterFactory:
         Args:
             dpi: DPI resolution for images
             enable_diff_check: Whether to enable difference checking
+            num_workers: Number of rasterization worker processes (None for default)
             
         Returns:
             PDFToImageConverterBase instance
         """
         return PDFToImageConverter(
             dpi=dpi,
-            enable_diff_check=enable_diff_check
+            enable_diff_check=enable_diff_check,
+            num_workers=num_workers
         )
     
     @staticmethod
@@ -127,7 +165,7 @@ class ConverterFactory:
             time_window: Time window in seconds
             
         Returns:
-            RateLimiter instance
+            RateLimiter instance (usable from threads and asyncio tasks alike)
         """
         return RateLimiter(
             max_requests=max_requests,
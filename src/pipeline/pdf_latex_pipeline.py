@@ -2,13 +2,100 @@
 Complete PDF to LaTeX conversion pipeline with dependency injection
 """
 import os
+import re
+import mmap
 import time
-import traceback
-from typing import Optional, Dict
+import hashlib
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Optional, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
 
 from ..converters.base import PDFToImageConverterBase, ImageToLatexConverterBase
 from ..converters.latex_error_fixer import LatexErrorFixer
-from ..utils import CheckpointManager, LatexIntegrator, LatexCompiler
+from ..converters._prompts import REVISION_PROMPT
+from ..utils import CheckpointManager, LatexIntegrator, LatexCompiler, ImageDiff
+
+logger = logging.getLogger(__name__)
+
+
+# Share of a page's tiles that must match its previous version to pass the old LaTeX as a hint
+HINT_TILE_FRACTION = 0.75
+
+_RE_PAGE_SECTION = re.compile(r'\A\\section\{Page \d+\}\n\n')
+
+# Standalone document used to test-compile a single page, split around the
+# title and body so it can be assembled with one join; the preamble is shared
+# by every test document and can be precompiled by the compiler
+_TEST_DOC_PREAMBLE = r"""\documentclass[12pt,a4paper]{article}
+\usepackage[utf8]{inputenc}
+\usepackage{amsmath}
+\usepackage{amsfonts}
+\usepackage{amssymb}
+\usepackage{graphicx}
+\usepackage{arydshln}
+\usepackage{geometry}
+\geometry{margin=1in}
+"""
+_TEST_DOC_HEAD = _TEST_DOC_PREAMBLE + r"""
+\title{"""
+_TEST_DOC_BODY = r"""}
+
+\begin{document}
+
+"""
+_TEST_DOC_TAIL = r"""
+
+\end{document}
+"""
+
+
+def _tile_hashes(path: str) -> List[str]:
+    """
+    Hash the pixels of an image file tile by tile
+    
+    Args:
+        path: Image file
+        
+    Returns:
+        Tile hashes as computed by ImageDiff.tile_hashes
+    """
+    with Image.open(path) as image:
+        pixels = np.asarray(image.convert('RGB'))
+    return ImageDiff.tile_hashes(pixels)
+
+
+def _file_hash(path: str, chunk_size: int = 4 << 20) -> str:
+    """
+    Hash a file's contents
+    
+    The file is memory-mapped and fed to the hash in slices, so large files
+    are hashed straight from the page cache without being copied into memory.
+    
+    Args:
+        path: File to hash
+        chunk_size: Bytes hashed per update
+        
+    Returns:
+        blake2b hex digest (16 bytes)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty file
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    return digest.hexdigest()
 
 
 class PDFToLatexPipeline:
@@ -27,7 +114,9 @@ class PDFToLatexPipeline:
         latex_compiler: Optional[LatexCompiler] = None,
         latex_error_fixer: Optional[LatexErrorFixer] = None,
         compile_and_fix: bool = False,
-        max_fix_attempts: int = 2
+        max_fix_attempts: int = 2,
+        concurrency: int = 1,
+        compile_workers: int = 0
     ):
         """
         Initialize pipeline with injected dependencies
@@ -41,6 +130,10 @@ class PDFToLatexPipeline:
             latex_error_fixer: Optional LaTeX error fixer (creates default if None)
             compile_and_fix: Whether to compile and fix errors after each page
             max_fix_attempts: Maximum attempts to fix compilation errors per page
+            concurrency: Pages converted at once by converters without async support
+                         (uses a thread pool when > 1)
+            compile_workers: Pages compiled and fixed at once when their LaTeX is
+                             ready ahead of time (0 = half the CPU cores)
         """
         self.pdf_converter = pdf_converter
         self.image_converter = image_converter
@@ -50,6 +143,8 @@ class PDFToLatexPipeline:
         self.latex_error_fixer = latex_error_fixer
         self.compile_and_fix = compile_and_fix
         self.max_fix_attempts = max_fix_attempts
+        self.concurrency = max(1, concurrency)
+        self.compile_workers = compile_workers or max(1, (os.cpu_count() or 1) // 2)
     
     def run(
         self,
@@ -75,6 +170,27 @@ class PDFToLatexPipeline:
         Returns:
             Dictionary with paths to generated files
         """
+        try:
+            return self._run(
+                pdf_path, output_dir, section_prefix, create_main_doc,
+                doc_title, add_page_titles, resume
+            )
+        finally:
+            # Fold the pages logged so far into the snapshot however the run
+            # ends, Ctrl+C included, so the snapshot has every completed page
+            self.checkpoint_manager.compact()
+    
+    def _run(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        section_prefix: str,
+        create_main_doc: bool,
+        doc_title: str,
+        add_page_titles: bool,
+        resume: bool
+    ) -> dict:
+        """Body of run(), which compacts the checkpoint log afterwards"""
         print(f"\n{'='*60}")
         print(f"PDF to LaTeX Conversion Pipeline")
         print(f"(Modular Architecture with Dependency Injection)")
@@ -100,15 +216,28 @@ class PDFToLatexPipeline:
                 'main_document_updated': False,
                 'main_document_path': None
             }
+        page_index = self.checkpoint_manager.build_index(checkpoint)
         
         # Stage 1: Check and update all images
-        print("Stage 1: Checking images...")
         image_dir = os.path.join(output_dir, "images")
-        images, image_versions = self.pdf_converter.convert(pdf_path, image_dir, checkpoint)
+        # Taken before rendering so edits made while Stage 1 runs aren't masked
+        source_fingerprint = self.pdf_converter.source_fingerprint(pdf_path)
+        prefetched = {}
+        overlap_stages = hasattr(self.image_converter, 'convert_async')
+        if overlap_stages:
+            # Async converters start on each page as soon as it is rasterized
+            print("Stage 1: Checking images (converting changed pages as they are ready)...")
+            images, image_versions, prefetched = asyncio.run(
+                self._rasterize_and_convert(pdf_path, image_dir, checkpoint)
+            )
+        else:
+            print("Stage 1: Checking images...")
+            images, image_versions = self.pdf_converter.convert(pdf_path, image_dir, checkpoint)
         
         # Update checkpoint with image versions
+        page_metadata = self.pdf_converter.page_metadata
         for page_num, img_version in image_versions.items():
-            page_entry = self.checkpoint_manager.get_page_entry(checkpoint, page_num)
+            page_entry = page_index.get(page_num)
             old_version = page_entry['image_version'] if page_entry else 0
             
             # Update image version and mark if image was updated
@@ -116,8 +245,23 @@ class PDFToLatexPipeline:
                 checkpoint, 
                 page_num,
                 image_version=img_version,
-                image_updated=(img_version > old_version)
+                image_updated=(img_version > old_version),
+                index=page_index
             )
+            if page_num in page_metadata:
+                page_index[page_num].update(page_metadata[page_num])
+                # Superseded by image_tiles
+                page_index[page_num].pop('image_phash', None)
+        
+        # Digests Stage 1 took while writing images; pages whose image was kept
+        # from an earlier run are hashed from disk when needed
+        image_digests = self.pdf_converter.image_digests
+        image_hashes = {page_num: d['image_hash'] for page_num, d in image_digests.items()}
+        tile_hashes: Dict[int, List[str]] = {page_num: d['tile_hashes'] for page_num, d in image_digests.items()}
+        
+        checkpoint.update(source_fingerprint)
+        # Superseded by source_mtime_ns
+        checkpoint.pop('source_mtime', None)
         
         print(f"✓ Checked {len(images)} images\n")
         
@@ -132,13 +276,19 @@ class PDFToLatexPipeline:
         pages_new = []
         
         for page_num in range(1, len(images) + 1):
-            page_entry = self.checkpoint_manager.get_page_entry(checkpoint, page_num)
+            page_entry = page_index.get(page_num)
             
             if page_entry is None:
                 # New page
                 pages_new.append(page_num)
                 pages_to_process.append(page_num)
             elif page_entry['image_version'] > page_entry.get('latex_version', 0):
+                if self._same_image_as_latex(page_entry, images[page_num - 1], image_hashes.get(page_num)):
+                    # Same bytes the LaTeX was converted from: carry it forward
+                    page_entry['latex_version'] = page_entry['image_version']
+                    if not page_entry.get('latex_updated', False):
+                        pages_to_process.append(page_num)
+                    continue
                 # Image is newer than LaTeX
                 pages_updated_images.append(page_num)
                 pages_to_process.append(page_num)
@@ -156,52 +306,142 @@ class PDFToLatexPipeline:
         else:
             print(f"✓ All pages are up to date!\n")
         
+        pages_to_process_set = frozenset(pages_to_process)
+        total_to_process = len(pages_to_process)
+        processed_count = 0
+        
+        # Pages whose image matches an already converted page tile for tile reuse
+        # its LaTeX; pages that mostly match their previous version get it as a hint
+        latex_hints: Dict[int, str] = {}
+        if pages_to_process and not overlap_stages:
+            prefetched.update(self._match_tiles(
+                page_index, images, pages_to_process, latex_dir, section_prefix, tile_hashes, latex_hints
+            ))
+        
         # Save checkpoint after image check
         self.checkpoint_manager.save_checkpoint(checkpoint)
         
         latex_sections = []
         start_time = time.time()
+        # Loop-invariant paths
+        main_tex_path = os.path.join(output_dir, "main.tex")
+        
+        # Section files already on disk, read in one directory scan rather than a
+        # stat per skipped page
+        try:
+            with os.scandir(latex_dir) as entries:
+                existing_sections = {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            existing_sections = set()
+        
+        # Converters that support concurrency convert all pending pages up front;
+        # results are then committed page by page in the loop below
+        to_convert = [page_num for page_num in pages_to_process if page_num not in prefetched]
+        concurrent_converter = hasattr(self.image_converter, 'convert_many')
+        if not overlap_stages and to_convert and concurrent_converter:
+            pending_images = [images[page_num - 1] for page_num in to_convert]
+            
+            async def convert_pending():
+                try:
+                    return await self.image_converter.convert_many(
+                        pending_images, mime_type=self.pdf_converter.mime_type
+                    )
+                finally:
+                    # Loop-bound clients have to be closed before asyncio.run() ends the loop
+                    await self.image_converter.aclose()
+            
+            results = asyncio.run(convert_pending())
+            prefetched.update(zip(to_convert, results))
+        
+        compile_enabled = bool(self.compile_and_fix and self.latex_compiler and self.latex_error_fixer)
+        
+        def compile_page(page_num: int, latex_code: str) -> str:
+            return self._compile_and_fix_latex(
+                latex_code,
+                page_num=page_num,
+                section_title=f"Page {page_num}" if add_page_titles else None,
+                output_dir=latex_dir,
+                max_fix_attempts=self.max_fix_attempts
+            )
+        
+        def convert_page(page_num: int) -> str:
+            latex_code = self.image_converter.convert(
+                images[page_num - 1],
+                custom_prompt=latex_hints.get(page_num),
+                mime_type=self.pdf_converter.mime_type
+            )
+            return compile_page(page_num, latex_code) if compile_enabled else latex_code
+        
+        # Synchronous converters run in a thread pool, keeping a bounded window of
+        # pages in flight; each worker also compiles its page, and results are
+        # still committed in page order below
+        executor = None
+        pending_pages = iter(to_convert)
+        
+        def submit_next():
+            page_num = next(pending_pages, None)
+            if page_num is not None:
+                prefetched[page_num] = executor.submit(convert_page, page_num)
+        
+        if not overlap_stages and not concurrent_converter and to_convert and self.concurrency > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+            for _ in range(2 * self.concurrency):
+                submit_next()
+        
+        # LaTeX that is already available (converted up front or reused) is compiled
+        # for all pages at once; the compiler runs as a subprocess and the fixer
+        # waits on the API, so threads are enough to keep several going
+        compiling: Dict[int, concurrent.futures.Future] = {}
+        compile_pool = None
+        ready = [page_num for page_num, code in prefetched.items() if isinstance(code, str)]
+        if compile_enabled and self.compile_workers > 1 and len(ready) > 1:
+            compile_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.compile_workers)
+            for page_num in ready:
+                compiling[page_num] = compile_pool.submit(compile_page, page_num, prefetched.pop(page_num))
         
         for i, image_path in enumerate(images, start=1):
             # Skip pages that don't need processing
-            if i not in pages_to_process:
+            if i not in pages_to_process_set:
                 # Get existing section file
-                section_file = os.path.join(latex_dir, f"{section_prefix}_page{i}.tex")
-                if os.path.exists(section_file):
+                section_name = f"{section_prefix}_page{i}.tex"
+                if section_name in existing_sections:
+                    section_file = f"{latex_dir}/{section_name}"
                     latex_sections.append(section_file)
                     
                     # Ensure it's in main document even if skipped
                     if create_main_doc:
-                        main_doc_path = os.path.join(output_dir, "main.tex")
                         self.latex_integrator.append_section_to_main(
                             section_file=section_file,
-                            main_doc_path=main_doc_path,
+                            main_doc_path=main_tex_path,
                             title=doc_title
                         )
                 
-                print(f"⏭️ Skipping page {i}/{len(images)} (up to date)")
+                logger.info(f"⏭️ Skipping page {i}/{len(images)} (up to date)")
                 continue
             
             try:
-                page_entry = self.checkpoint_manager.get_page_entry(checkpoint, i)
+                page_entry = page_index.get(i)
                 current_img_version = page_entry['image_version'] if page_entry else 1
                 
-                print(f"\n📄 Processing page {i}/{len(images)} (image v{current_img_version})...")
+                logger.info(f"\n📄 Processing page {i}/{len(images)} (image v{current_img_version})...")
                 
-                # Convert image to LaTeX using injected converter
-                latex_code = self.image_converter.convert(image_path)
+                # Convert image to LaTeX using injected converter, then compile and
+                # fix errors if enabled (futures come back already compiled)
+                if i in compiling:
+                    latex_code = compiling.pop(i).result()
+                elif i in prefetched:
+                    latex_code = prefetched.pop(i)
+                    if isinstance(latex_code, concurrent.futures.Future):
+                        submit_next()
+                        latex_code = latex_code.result()
+                    elif isinstance(latex_code, BaseException):
+                        raise latex_code
+                    elif compile_enabled:
+                        latex_code = compile_page(i, latex_code)
+                else:
+                    latex_code = convert_page(i)
                 
                 section_title = f"Page {i}" if add_page_titles else None
-
-                # Compile and fix errors if enabled
-                if self.compile_and_fix and self.latex_compiler and self.latex_error_fixer:
-                    latex_code = self._compile_and_fix_latex(
-                        latex_code,
-                        page_num=i,
-                        section_title=section_title,
-                        output_dir=latex_dir,
-                        max_fix_attempts=self.max_fix_attempts
-                    )
                 
                 # Save as section
                 section_file = self.latex_integrator.save_section(
@@ -215,41 +455,55 @@ class PDFToLatexPipeline:
                 
                 # Append to main document immediately if create_main_doc is enabled
                 if create_main_doc:
-                    main_doc_path = os.path.join(output_dir, "main.tex")
                     self.latex_integrator.append_section_to_main(
                         section_file=section_file,
-                        main_doc_path=main_doc_path,
+                        main_doc_path=main_tex_path,
                         title=doc_title
                     )
-                    print(f"✓ Added page {i} to main.tex")
+                    logger.info(f"✓ Added page {i} to main.tex")
                 
                 # Update checkpoint - LaTeX is now same version as image
                 self.checkpoint_manager.update_page_entry(
                     checkpoint,
                     i,
                     latex_version=current_img_version,
-                    latex_updated=True
+                    latex_updated=True,
+                    index=page_index
                 )
+                image_hash = image_hashes.get(i) or _file_hash(image_path)
+                page_tiles = tile_hashes.get(i) or _tile_hashes(image_path)
+                page_entry = page_index[i]
+                page_entry['image_hash'] = image_hash
+                page_entry['tile_hashes'] = page_tiles
                 
-                # Save checkpoint after each successful page
-                self.checkpoint_manager.save_checkpoint(checkpoint)
+                # Record the page in the checkpoint log after each successful page
+                self.checkpoint_manager.append({
+                    'page': i,
+                    'image_version': current_img_version,
+                    'latex_version': current_img_version,
+                    'latex_updated': True,
+                    'image_hash': image_hash,
+                    'tile_hashes': page_tiles
+                })
                 
                 # Calculate estimated time remaining
                 elapsed = time.time() - start_time
-                processed_count = len([p for p in pages_to_process if p <= i])
-                remaining_pages = len(pages_to_process) - processed_count
+                processed_count += 1
+                remaining_pages = total_to_process - processed_count
                 
                 if processed_count > 0:
                     avg_time_per_page = elapsed / processed_count
                     estimated_remaining = avg_time_per_page * remaining_pages
-                    print(f"✓ Page {i}/{len(images)} complete ({processed_count}/{len(pages_to_process)} processed)")
+                    logger.info(f"✓ Page {i}/{len(images)} complete ({processed_count}/{total_to_process} processed)")
                     if remaining_pages > 0:
-                        print(f"   Est. time remaining: {estimated_remaining/60:.1f} minutes")
+                        logger.info(f"   Est. time remaining: {estimated_remaining/60:.1f} minutes")
                 
             except Exception as e:
-                print(f"\n❌ Failed to process page {i}: {str(e)}")
-                print(f"📋 Progress saved. You can resume by running the script again.")
-                traceback.print_exc()
+                logger.exception(f"\n❌ Failed to process page {i}: {str(e)}")
+                logger.info(f"📋 Progress saved. You can resume by running the script again.")
+                for pool in (executor, compile_pool):
+                    if pool is not None:
+                        pool.shutdown(wait=False, cancel_futures=True)
                 
                 # Return partial results
                 return {
@@ -261,31 +515,26 @@ class PDFToLatexPipeline:
                     'status': 'partial'
                 }
         
+        for pool in (executor, compile_pool):
+            if pool is not None:
+                pool.shutdown()
+        
         print(f"\n✓ All {len(latex_sections)} LaTeX sections ready\n")
         
         # Stage 3: Finalize main document
         main_doc_path = None
         if create_main_doc:
             print("Stage 3: Finalizing main document...")
-            main_doc_path = os.path.join(output_dir, "main.tex")
+            main_doc_path = main_tex_path
             
-            # Main document should already exist from incremental updates
-            # But ensure all sections are present (in case of resume)
+            # Main document already lists every section from the incremental
+            # updates in the page loop; create it only if there were none
             if not os.path.exists(main_doc_path):
-                # Create it fresh if it doesn't exist
                 self.latex_integrator.create_main_document(
                     latex_sections,
                     output_path=main_doc_path,
                     title=doc_title
                 )
-            else:
-                # Verify all sections are included
-                for section_file in latex_sections:
-                    self.latex_integrator.append_section_to_main(
-                        section_file=section_file,
-                        main_doc_path=main_doc_path,
-                        title=doc_title
-                    )
             
             print(f"✓ Main document ready at {main_doc_path}")
             checkpoint['main_document_updated'] = True
@@ -316,6 +565,209 @@ class PDFToLatexPipeline:
             'status': 'complete'
         }
     
+    def _match_tiles(
+        self,
+        page_index: Dict[int, Dict],
+        images: List[str],
+        pages_to_process: List[int],
+        latex_dir: str,
+        section_prefix: str,
+        tile_hashes: Dict[int, List[str]],
+        latex_hints: Dict[int, str]
+    ) -> Dict[int, str]:
+        """
+        Compare the tiles of pages about to be converted with already converted pages
+        
+        Args:
+            page_index: Checkpoint page entries by page number
+            images: Image paths in page order
+            pages_to_process: Pages that need LaTeX
+            latex_dir: Directory holding the section files
+            section_prefix: Prefix of the section filenames
+            tile_hashes: Known page_num -> tile hashes; filled in for every page checked
+            latex_hints: Filled with page_num -> conversion prompt carrying the
+                         previous LaTeX, for pages that mostly match their old tiles
+            
+        Returns:
+            Dict of page_num -> LaTeX reused from a page with identical tiles
+        """
+        def read_section(page_num: int) -> Optional[str]:
+            section_file = f"{latex_dir}/{section_prefix}_page{page_num}.tex"
+            if not os.path.exists(section_file):
+                return None
+            with open(section_file, 'r', encoding='utf-8') as f:
+                return _RE_PAGE_SECTION.sub('', f.read(), count=1)
+        
+        converted = {}
+        for entry in page_index.values():
+            if entry.get('latex_updated') and entry.get('tile_hashes'):
+                converted.setdefault(tuple(entry['tile_hashes']), entry['page'])
+        
+        reused = {}
+        for page_num in pages_to_process:
+            tiles = tile_hashes.get(page_num) or _tile_hashes(images[page_num - 1])
+            tile_hashes[page_num] = tiles
+            
+            match = converted.get(tuple(tiles))
+            if match is not None:
+                latex_code = read_section(match)
+                if latex_code is not None:
+                    logger.info(f"♻️ Page {page_num} matches page {match} tile for tile - reusing its LaTeX")
+                    reused[page_num] = latex_code
+                    continue
+            
+            page_entry = page_index.get(page_num)
+            old_tiles = page_entry.get('tile_hashes') if page_entry else None
+            if old_tiles and len(old_tiles) == len(tiles):
+                matching = sum(a == b for a, b in zip(old_tiles, tiles))
+                if matching >= HINT_TILE_FRACTION * len(tiles):
+                    previous_latex = read_section(page_num)
+                    if previous_latex:
+                        latex_hints[page_num] = REVISION_PROMPT.format(previous_latex=previous_latex)
+        return reused
+    
+    @staticmethod
+    def _same_image_as_latex(page_entry: Dict, image_path: str, current_hash: Optional[str] = None) -> bool:
+        """
+        Whether the image still has the content hash recorded when its LaTeX was made
+        
+        current_hash is the image's hash if already known; otherwise the file is hashed.
+        """
+        image_hash = page_entry.get('image_hash')
+        if image_hash is None:
+            return False
+        if current_hash is None:
+            if not os.path.exists(image_path):
+                return False
+            current_hash = _file_hash(image_path)
+        return current_hash == image_hash
+
+    @classmethod
+    def _needs_latex(
+        cls,
+        page_entry: Optional[Dict],
+        image_version: int,
+        image_path: str,
+        image_hash: Optional[str] = None
+    ) -> bool:
+        """Whether a page needs (re)conversion given its checkpoint entry before this run"""
+        if page_entry is None:
+            return True
+        if not page_entry.get('latex_updated', False):
+            return True
+        return image_version > page_entry.get('latex_version', 0) and not cls._same_image_as_latex(
+            page_entry, image_path, image_hash
+        )
+    
+    async def _rasterize_and_convert(
+        self,
+        pdf_path: str,
+        image_dir: str,
+        checkpoint: Dict
+    ) -> Tuple[List[str], Dict[int, int], Dict[int, object]]:
+        """
+        Overlap Stage 1 and the LaTeX conversion of Stage 2
+        
+        A producer thread pushes rasterized pages into a bounded queue while
+        consumer tasks convert the pages that need new LaTeX. Errors on a page
+        are recorded for that page; if a consumer dies anyway, the producer is
+        stopped so it can't block forever on a queue nobody drains.
+        
+        Args:
+            pdf_path: Path to input PDF
+            image_dir: Directory to save images
+            checkpoint: Checkpoint data for version tracking
+            
+        Returns:
+            Tuple of (image paths in page order, page_num -> image_version,
+            page_num -> LaTeX code or the exception raised while converting)
+        """
+        loop = asyncio.get_running_loop()
+        num_consumers = max(1, getattr(self.image_converter, 'max_in_flight', 1))
+        num_workers = getattr(self.pdf_converter, 'num_workers', 1) or 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=num_workers * 2)
+        done = object()
+        page_index = self.checkpoint_manager.build_index(checkpoint)
+        
+        rendered = {}
+        converted = {}
+        
+        # Set when the workers are shutting down early; checked before every put
+        stop = threading.Event()
+        
+        def put(item):
+            if stop.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return True
+        
+        def drain():
+            # Frees the slot a put that began before stop was set may be waiting for
+            while not queue.empty():
+                queue.get_nowait()
+        
+        def produce():
+            pages = self.pdf_converter.iter_pages(pdf_path, image_dir, checkpoint)
+            try:
+                for page in pages:
+                    if not put(page):
+                        break
+            finally:
+                # Cancels the renders still running if we stopped early
+                pages.close()
+                for _ in range(num_consumers):
+                    if not put(done):
+                        break
+        
+        async def consume():
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        return
+                    page_num, image_path, version = item
+                    try:
+                        rendered[page_num] = (image_path, version)
+                        page_entry = page_index.get(page_num)
+                        image_hash = self.pdf_converter.image_digests.get(page_num, {}).get('image_hash')
+                        if not await asyncio.to_thread(self._needs_latex, page_entry, version, image_path, image_hash):
+                            continue
+                        converted[page_num] = await self.image_converter.convert_async(
+                            image_path, mime_type=self.pdf_converter.mime_type
+                        )
+                    except Exception as e:
+                        converted[page_num] = e
+            except BaseException:
+                stop.set()
+                drain()
+                raise
+        
+        consumers = [asyncio.create_task(consume()) for _ in range(num_consumers)]
+        try:
+            await asyncio.to_thread(produce)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            if stop.is_set():
+                # No more sentinels are coming: the remaining consumers would wait forever
+                for task in consumers:
+                    task.cancel()
+            outcomes = await asyncio.gather(*consumers, return_exceptions=True)
+            drain()
+            # Loop-bound clients have to be closed before asyncio.run() ends the loop
+            aclose = getattr(self.image_converter, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+        
+        images = [rendered[page_num][0] for page_num in sorted(rendered)]
+        image_versions = {page_num: rendered[page_num][1] for page_num in sorted(rendered)}
+        return images, image_versions, converted
+    
     def _compile_and_fix_latex(
         self,
         latex_code: str,
@@ -331,85 +783,58 @@ class PDFToLatexPipeline:
             latex_code: The LaTeX code to compile
             page_num: Page number being processed
             section_title: Title for the section
-            output_dir: Directory for temporary files
+            output_dir: Output directory of the page (test compilations run in a scratch directory)
             max_fix_attempts: Maximum attempts to fix compilation errors
             
         Returns:
             Fixed LaTeX code (or original if no errors or fixing fails)
         """
-        import tempfile
-        
-        print(f"   🔨 Testing compilation for page {page_num}...")
+        logger.info(f"   🔨 Testing compilation for page {page_num}...")
+        jobname = f"page{page_num}_test"
         
-        # Create a temporary complete LaTeX document for testing
+        # Compile a complete test document built around the page
         temp_latex = self._create_test_document(latex_code, section_title)
+        success, output, errors = self.latex_compiler.compile_source(
+            temp_latex, jobname=jobname, preamble=_TEST_DOC_PREAMBLE
+        )
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.tex',
-            dir=output_dir,
-            delete=False,
-            encoding='utf-8'
-        ) as temp_file:
-            temp_file.write(temp_latex)
-            temp_path = temp_file.name
+        if success:
+            logger.info(f"   ✅ Page {page_num} compiles successfully!")
+            return latex_code
         
-        try:
-            # Try to compile
-            success, output, errors = self.latex_compiler.compile(temp_path, clean_aux=True)
-            
-            if success:
-                print(f"   ✅ Page {page_num} compiles successfully!")
-                return latex_code
-            
-            # Compilation failed, try to fix
-            print(f"   ❌ Page {page_num} has {len(errors)} compilation error(s)")
+        # Compilation failed, try to fix
+        logger.error(f"   ❌ Page {page_num} has {len(errors)} compilation error(s)")
+        
+        fixed_code = latex_code
+        for attempt in range(1, max_fix_attempts + 1):
+            logger.info(f"   🔧 Fix attempt {attempt}/{max_fix_attempts}...")
             
-            fixed_code = latex_code
-            for attempt in range(1, max_fix_attempts + 1):
-                print(f"   🔧 Fix attempt {attempt}/{max_fix_attempts}...")
+            try:
+                # Use error fixer to fix the code
+                fixed_code = self.latex_error_fixer.fix_errors(
+                    latex_code=fixed_code,
+                    errors=errors
+                )
                 
-                try:
-                    # Use error fixer to fix the code
-                    fixed_code = self.latex_error_fixer.fix_errors(
-                        latex_code=fixed_code,
-                        errors=errors
-                    )
-                    
-                    # Test the fixed code
-                    temp_latex_fixed = self._create_test_document(fixed_code, section_title)
-                    with open(temp_path, 'w', encoding='utf-8') as f:
-                        f.write(temp_latex_fixed)
-                    
-                    success, output, errors = self.latex_compiler.compile(temp_path, clean_aux=True)
-                    
-                    if success:
-                        print(f"   ✅ Successfully fixed errors for page {page_num}!")
-                        return fixed_code
-                    else:
-                        print(f"   ⚠️ Still has {len(errors)} error(s) after fix attempt {attempt}")
-                        
-                except Exception as e:
-                    print(f"   ⚠️ Error during fix attempt {attempt}: {str(e)}")
+                # Test the fixed code
+                temp_latex_fixed = self._create_test_document(fixed_code, section_title)
+                success, output, errors = self.latex_compiler.compile_source(
+                    temp_latex_fixed, jobname=jobname, preamble=_TEST_DOC_PREAMBLE
+                )
+                
+                if success:
+                    logger.info(f"   ✅ Successfully fixed errors for page {page_num}!")
+                    return fixed_code
+                else:
+                    logger.warning(f"   ⚠️ Still has {len(errors)} error(s) after fix attempt {attempt}")
                     
-            # All fix attempts failed
-            print(f"   ❌ Could not fix all errors after {max_fix_attempts} attempts")
-            print(f"   ⚠️ Using original code (may have compilation errors)")
-            return latex_code
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-                # Also clean any auxiliary files
-                base_path = os.path.splitext(temp_path)[0]
-                for ext in ['.aux', '.log', '.out', '.xdv', '.pdf']:
-                    aux_file = base_path + ext
-                    if os.path.exists(aux_file):
-                        os.unlink(aux_file)
             except Exception as e:
-                print(f"   ⚠️ Could not clean temporary files: {str(e)}")
+                logger.warning(f"   ⚠️ Error during fix attempt {attempt}: {str(e)}")
+                
+        # All fix attempts failed
+        logger.error(f"   ❌ Could not fix all errors after {max_fix_attempts} attempts")
+        logger.warning(f"   ⚠️ Using original code (may have compilation errors)")
+        return latex_code
     
     def _create_test_document(self, latex_content: str, title: Optional[str] = "Test") -> str:
         """
@@ -422,21 +847,4 @@ class PDFToLatexPipeline:
         Returns:
             Complete LaTeX document as string
         """
-        return r"""\documentclass[12pt,a4paper]{article}
-\usepackage[utf8]{inputenc}
-\usepackage{amsmath}
-\usepackage{amsfonts}
-\usepackage{amssymb}
-\usepackage{graphicx}
-\usepackage{arydshln}
-\usepackage{geometry}
-\geometry{margin=1in}
-
-\title{""" + (title or "") + r"""}
-
-\begin{document}
-
-""" + latex_content + r"""
-
-\end{document}
-"""
+        return "".join((_TEST_DOC_HEAD, title or "", _TEST_DOC_BODY, latex_content, _TEST_DOC_TAIL))
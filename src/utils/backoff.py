@@ -0,0 +1,71 @@
+"""
+Retry backoff helpers for API calls
+Jittered exponential backoff that honors server-provided retry hints
+"""
+import time
+import random
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def retry_after_seconds(error: Optional[BaseException]) -> Optional[float]:
+    """
+    Extract the server's requested retry delay from an API error
+
+    Looks at the Retry-After / retry-after-ms headers of the HTTP response
+    attached to SDK exceptions (OpenAI and Anthropic expose `error.response`).
+
+    Args:
+        error: Exception raised by the API call
+
+    Returns:
+        Delay in seconds, or None if the error carries no usable hint
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    try:
+        retry_after_ms = headers.get('retry-after-ms')
+        if retry_after_ms is not None:
+            return max(0.0, float(retry_after_ms) / 1000)
+
+        retry_after = headers.get('retry-after')
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            # HTTP-date form
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(
+    base_delay: float,
+    attempt: int,
+    error: Optional[BaseException] = None,
+    max_delay: float = 60.0
+) -> float:
+    """
+    Compute how long to wait before the next attempt
+
+    Uses the server's Retry-After hint when the error provides one, otherwise
+    min(max_delay, base_delay * 2**(attempt - 1)) scaled by a random factor in
+    [0.5, 1.5) so concurrent workers don't retry in lockstep.
+
+    Args:
+        base_delay: Delay for the first retry in seconds
+        attempt: Number of the attempt that just failed (1-based)
+        error: Exception raised by the failed attempt
+        max_delay: Upper bound for the exponential part
+
+    Returns:
+        Delay in seconds
+    """
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return retry_after
+    return min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
@@ -3,17 +3,45 @@ Checkpoint Manager with Version Tracking
 Manages conversion checkpoints for resume capability
 """
 import os
-import json
+import logging
 from pathlib import Path
 from typing import Dict, Optional
 from datetime import datetime
 
+from . import fast_json
+
+logger = logging.getLogger(__name__)
+
 
 class CheckpointManager:
     """Manages conversion checkpoints with version tracking for images and LaTeX"""
     
-    def __init__(self, checkpoint_file: str = "output/checkpoint.json"):
+    def __init__(
+        self,
+        checkpoint_file: str = "output/checkpoint.json",
+        fsync_every: int = 1,
+        compact_every: int = 64
+    ):
+        """
+        Initialize checkpoint manager
+        
+        Args:
+            checkpoint_file: Path to the JSON checkpoint snapshot
+            fsync_every: fsync the append-only log every N appended entries
+                         (each entry is a finished page, so the default is every one)
+            compact_every: Fold the log into the snapshot every N appended entries
+        """
         self.checkpoint_file = checkpoint_file
+        self.log_file = os.path.splitext(checkpoint_file)[0] + ".wal"
+        self.fsync_every = max(1, fsync_every)
+        self.compact_every = max(1, compact_every)
+        self._log_fd: Optional[int] = None
+        self._appends_since_fsync = 0
+        self._appends_since_compact = 0
+        self._state: Optional[Dict] = None
+        # Page number -> entry for the 'pages' list it was built from
+        self._index: Dict[int, Dict] = {}
+        self._indexed_pages: Optional[list] = None
         Path(os.path.dirname(checkpoint_file)).mkdir(parents=True, exist_ok=True)
     
     def create_page_entry(self, page_num: int, image_version: int = 0, latex_version: int = 0) -> Dict:
@@ -27,37 +55,163 @@ class CheckpointManager:
         }
     
     def save_checkpoint(self, data: Dict):
-        """Save checkpoint data"""
+        """Save a full checkpoint snapshot atomically and reset the append-only log"""
         data['timestamp'] = datetime.now().isoformat()
-        with open(self.checkpoint_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"💾 Checkpoint saved to {self.checkpoint_file}")
+        # Denormalized so status displays needn't scan the pages
+        data['progress'] = self._progress(data)
+        tmp_file = self.checkpoint_file + ".tmp"
+        payload = memoryview(fast_json.dumps(data))
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while payload:
+                payload = payload[os.write(fd, payload):]
+            # Flush before the rename so a crash can't leave a renamed but empty snapshot
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, self.checkpoint_file)
+        
+        # Everything in the log is now part of the snapshot
+        self._truncate_log()
+        self._state = data
+        logger.info(f"💾 Checkpoint saved to {self.checkpoint_file}")
+    
+    def append(self, entry: Dict):
+        """
+        Record a page update in the append-only log
+        
+        Much cheaper than save_checkpoint() because only the delta is written.
+        The log is folded into the snapshot every `compact_every` entries.
+        
+        Args:
+            entry: Page entry fields to update, including 'page'
+        """
+        if self._log_fd is None:
+            self._log_fd = os.open(self.log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.write(self._log_fd, fast_json.dumps_line(entry))
+        
+        self._appends_since_fsync += 1
+        if self._appends_since_fsync >= self.fsync_every:
+            os.fsync(self._log_fd)
+            self._appends_since_fsync = 0
+        
+        if self._state is not None:
+            self._apply_entry(self._state, entry)
+        
+        self._appends_since_compact += 1
+        if self._appends_since_compact >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        """Fold the append-only log into the checkpoint snapshot (no-op if nothing was logged)"""
+        if self._state is not None and (self._log_fd is not None or self._appends_since_compact):
+            self.save_checkpoint(self._state)
     
-    def load_checkpoint(self) -> Optional[Dict]:
-        """Load checkpoint data if exists"""
+    def load_checkpoint(self, quiet: bool = False) -> Optional[Dict]:
+        """
+        Load checkpoint data if exists, replaying any entries from the append-only log
+        
+        Args:
+            quiet: Don't report what was loaded (for status displays)
+        """
+        data = None
         if os.path.exists(self.checkpoint_file):
-            with open(self.checkpoint_file, 'r') as f:
-                data = json.load(f)
-            print(f"📂 Loaded checkpoint from {self.checkpoint_file}")
-            print(f"   Last updated: {data.get('timestamp', 'Unknown')}")
-            return data
-        return None
+            with open(self.checkpoint_file, 'rb') as f:
+                data = fast_json.loads(f.read())
+            if not quiet:
+                logger.info(f"📂 Loaded checkpoint from {self.checkpoint_file}")
+                logger.info(f"   Last updated: {data.get('timestamp', 'Unknown')}")
+        
+        if os.path.exists(self.log_file):
+            replayed = 0
+            with open(self.log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = fast_json.loads(line)
+                    except ValueError:
+                        # A torn final line from an interrupted write
+                        break
+                    if data is None:
+                        data = {'pages': []}
+                    self._apply_entry(data, entry)
+                    replayed += 1
+            if replayed:
+                # The snapshot's summary predates the replayed pages
+                data['progress'] = self._progress(data)
+                if not quiet:
+                    logger.info(f"   Replayed {replayed} update(s) from {self.log_file}")
+        
+        self._state = data
+        return data
+    
+    @staticmethod
+    def _progress(data: Dict) -> Dict:
+        """Count the pages of checkpoint data whose LaTeX is done"""
+        pages = data.get('pages', [])
+        return {
+            'completed': sum(1 for page in pages if page.get('latex_updated', False)),
+            'total': len(pages)
+        }
     
     def clear_checkpoint(self):
         """Remove checkpoint file"""
+        self._truncate_log()
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
         if os.path.exists(self.checkpoint_file):
             os.remove(self.checkpoint_file)
-            print(f"🗑️ Checkpoint cleared")
+            logger.info(f"🗑️ Checkpoint cleared")
+        self._state = None
+    
+    def _truncate_log(self):
+        """Close and empty the append-only log"""
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        if os.path.exists(self.log_file):
+            os.truncate(self.log_file, 0)
+        self._appends_since_fsync = 0
+        self._appends_since_compact = 0
+    
+    def _apply_entry(self, checkpoint: Dict, entry: Dict):
+        """Merge a logged page entry into checkpoint data (last write wins)"""
+        fields = {k: v for k, v in entry.items() if k != 'page'}
+        self.update_page_entry(checkpoint, entry['page'])
+        self._page_index(checkpoint)[entry['page']].update(fields)
     
     def get_page_entry(self, checkpoint: Dict, page_num: int) -> Optional[Dict]:
         """Get page entry from checkpoint"""
         if not checkpoint or 'pages' not in checkpoint:
             return None
         
-        for page_entry in checkpoint['pages']:
-            if page_entry['page'] == page_num:
-                return page_entry
-        return None
+        return self._page_index(checkpoint).get(page_num)
+    
+    def _page_index(self, checkpoint: Dict) -> Dict[int, Dict]:
+        """
+        Page index of a checkpoint, rebuilt only when its 'pages' list changed
+        
+        The index of the most recently used list is kept; a different list, or
+        one whose length no longer matches (entries added behind our back),
+        is indexed again.
+        """
+        pages = checkpoint['pages']
+        if self._indexed_pages is not pages or len(self._index) != len(pages):
+            self._index = self.build_index(checkpoint)
+            self._indexed_pages = pages
+        return self._index
+    
+    @staticmethod
+    def build_index(checkpoint: Dict) -> Dict[int, Dict]:
+        """
+        Index the page entries of a checkpoint by page number
+        
+        Args:
+            checkpoint: Checkpoint data
+            
+        Returns:
+            Dict of page_num -> page entry (the entries themselves, not copies)
+        """
+        return {entry['page']: entry for entry in checkpoint.get('pages', [])}
     
     def update_page_entry(
         self, 
@@ -66,23 +220,31 @@ class CheckpointManager:
         image_version: Optional[int] = None,
         latex_version: Optional[int] = None,
         image_updated: Optional[bool] = None,
-        latex_updated: Optional[bool] = None
+        latex_updated: Optional[bool] = None,
+        index: Optional[Dict[int, Dict]] = None
     ) -> Dict:
-        """Update or create a page entry in checkpoint"""
+        """
+        Update or create a page entry in checkpoint
+        
+        Args:
+            index: Page index from build_index(); used for the lookup and kept
+                   in sync when a new entry is created
+        """
         if 'pages' not in checkpoint:
             checkpoint['pages'] = []
         
         # Find existing entry
-        page_entry = None
-        for entry in checkpoint['pages']:
-            if entry['page'] == page_num:
-                page_entry = entry
-                break
+        if index is None:
+            index = self._page_index(checkpoint)
+        page_entry = index.get(page_num)
         
         # Create new entry if doesn't exist
         if page_entry is None:
             page_entry = self.create_page_entry(page_num)
             checkpoint['pages'].append(page_entry)
+            index[page_num] = page_entry
+            if index is not self._index and self._indexed_pages is checkpoint['pages']:
+                self._index[page_num] = page_entry
         
         # Update fields
         if image_version is not None:
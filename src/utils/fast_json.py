@@ -0,0 +1,37 @@
+"""
+Fast JSON serialization helpers
+Uses orjson when installed and falls back to the standard library json module
+NumPy scalars and arrays are serialized natively by orjson
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to indented JSON bytes (matches json.dumps(obj, indent=2))"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize obj to compact single-line JSON bytes terminated by a newline"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return (json.dumps(obj, separators=(',', ':')) + '\n').encode('utf-8')
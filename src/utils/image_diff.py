@@ -1,15 +1,74 @@
 """
 Image difference detection for comparing two images
 """
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image, ImageDraw
 from scipy import ndimage
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _overlap_labels(xs, ys, rs):
+    """
+    Group circles that overlap, directly or through a chain of other circles
+    
+    Flood fill over the overlap graph without materializing it, so memory stays
+    linear in the number of circles. Compiled with Numba when it is installed.
+    
+    Returns:
+        Number of groups and each circle's group, numbered by first circle
+    """
+    n = xs.shape[0]
+    labels = np.full(n, -1, dtype=np.int64)
+    stack = np.empty(n, dtype=np.int64)
+    num_groups = 0
+    for seed in range(n):
+        if labels[seed] >= 0:
+            continue
+        labels[seed] = num_groups
+        stack[0] = seed
+        top = 1
+        while top > 0:
+            top -= 1
+            i = stack[top]
+            for j in range(n):
+                if labels[j] < 0:
+                    dx = xs[i] - xs[j]
+                    dy = ys[i] - ys[j]
+                    reach = rs[i] + rs[j]
+                    if dx * dx + dy * dy < reach * reach:
+                        labels[j] = num_groups
+                        stack[top] = j
+                        top += 1
+        num_groups += 1
+    return num_groups, labels
+
+
+if numba is not None:
+    _overlap_labels = numba.njit(cache=True)(_overlap_labels)
 
 
 class ImageDiff:
     """Class for comparing two images and detecting changes"""
 
+    # Per-thread scratch arrays reused across find_clusters() calls
+    _buffers = threading.local()
+
     def __init__(self, image, new_image):
+        """Store the two images to compare (PIL images or numpy arrays)"""
         self.image = image
         self.new_image = new_image
 
@@ -25,6 +84,9 @@ class ImageDiff:
     @staticmethod
     def get_pixels(image):
         """Extract pixels from an image and return as a numpy array matrix"""
+        if isinstance(image, np.ndarray):
+            # Already decoded by the caller, no need to copy it again
+            return image
         return np.array(image)
 
     @staticmethod
@@ -36,11 +98,63 @@ class ImageDiff:
                 f"Got {pixels1.shape} and {pixels2.shape}"
             )
         
+        if pixels1.dtype == np.uint8 and pixels2.dtype == np.uint8:
+            if cv2 is not None:
+                # Single saturating pass at native dtype
+                return cv2.absdiff(pixels1, pixels2)
+            return np.maximum(pixels1, pixels2) - np.minimum(pixels1, pixels2)
+        
         # Calculate absolute difference
         diff = np.abs(pixels1.astype(np.float32) - pixels2.astype(np.float32))
         
         return diff.astype(np.uint8)
 
+    @staticmethod
+    def coarse_change_count(pixels1, pixels2, size=512, threshold=8):
+        """
+        Count changed regions on downscaled copies of two pixel matrices (requires OpenCV)
+        
+        A cheap pre-check: area averaging dilutes thin strokes, so the threshold is
+        much lower than threshold_diff's. Thin strokes and small shifts can still
+        vanish, so a low count only means the full-resolution comparison must decide.
+        """
+        if cv2 is None:
+            raise ImportError("OpenCV not installed. Install with: pip install opencv-python-headless")
+        height, width = pixels1.shape[:2]
+        dsize = (min(size, width), min(size, height))
+        small1 = cv2.resize(pixels1, dsize, interpolation=cv2.INTER_AREA)
+        small2 = cv2.resize(pixels2, dsize, interpolation=cv2.INTER_AREA)
+        diff = cv2.absdiff(small1, small2)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        mask = (diff > threshold).astype(np.uint8)
+        num_labels, _ = cv2.connectedComponents(mask)
+        # Label 0 is the background
+        return num_labels - 1
+
+    @staticmethod
+    def tile_hashes(pixels, grid=4):
+        """
+        Hash a pixel matrix tile by tile
+        
+        The matrix is split into grid x grid tiles and each tile's raw pixels are
+        hashed, so two images can be compared region by region without keeping
+        either one around.
+        
+        Returns:
+            grid * grid blake2b hex digests (8 bytes), row by row
+        """
+        height, width = pixels.shape[:2]
+        ys = [height * k // grid for k in range(grid + 1)]
+        xs = [width * k // grid for k in range(grid + 1)]
+        return [
+            hashlib.blake2b(
+                np.ascontiguousarray(pixels[ys[r]:ys[r + 1], xs[c]:xs[c + 1]]).tobytes(), digest_size=8
+            ).hexdigest()
+            for r in range(grid)
+            for c in range(grid)
+        ]
+
     @staticmethod
     def matrix_to_image(pixel_matrix):
         """Create an image from a pixel matrix"""
@@ -59,109 +173,137 @@ class ImageDiff:
             raise ValueError(f"Error saving image to {output_path}: {str(e)}")
 
     @staticmethod
-    def threshold_diff(diff_matrix, threshold=30):
-        """Apply a threshold to the difference matrix to make small differences blacker"""
-        # Create a copy to avoid modifying the original
-        result = diff_matrix.copy().astype(np.float32)
+    def threshold_diff(diff_matrix, threshold=30, out=None):
+        """
+        Apply a threshold to the difference matrix to make small differences blacker
         
-        # Set values below threshold to 0 (black)
-        result[result < threshold] = 0
+        Works in one pass at uint8. Pass out= (possibly diff_matrix itself) to
+        reuse a buffer instead of allocating a new matrix.
+        """
+        if diff_matrix.dtype != np.uint8:
+            diff_matrix = diff_matrix.astype(np.uint8)
         
-        return result.astype(np.uint8)
+        # Set values below threshold to 0 (black)
+        return np.multiply(diff_matrix, diff_matrix >= threshold, out=out)
 
     @staticmethod
     def _merge_overlapping_clusters(clusters):
-        """Merge overlapping or nearby clusters"""
-        if not clusters:
-            return []
+        """
+        Merge overlapping or nearby clusters
         
-        merged = []
-        used = set()
+        Clusters whose circles overlap, directly or through a chain of other
+        clusters, form one group. With Numba installed the groups come from a
+        compiled flood fill; otherwise pairwise overlaps are computed in one array
+        operation (squared distances, so no square roots) and the groups are
+        the connected components of the overlap graph. Groups are returned in
+        the order of their first cluster; a group of one keeps its cluster as is.
+        """
+        if len(clusters) < 2:
+            return list(clusters)
         
-        for i, (x1, y1, r1) in enumerate(clusters):
-            if i in used:
-                continue
-            
-            # Start a new merged cluster
-            group = [(x1, y1, r1)]
-            used.add(i)
-            
-            # Find all clusters that overlap with this one or any in the group
-            changed = True
-            while changed:
-                changed = False
-                for j, (x2, y2, r2) in enumerate(clusters):
-                    if j in used:
-                        continue
-                    
-                    # Check if cluster j overlaps with any cluster in the group
-                    for gx, gy, gr in group:
-                        distance = np.sqrt((x2 - gx)**2 + (y2 - gy)**2)
-                        if distance < (r2 + gr):  # Circles overlap
-                            group.append((x2, y2, r2))
-                            used.add(j)
-                            changed = True
-                            break
-            
-            # Merge the group into a single cluster
-            if len(group) == 1:
-                merged.append(group[0])
-            else:
-                # Calculate new center as weighted average
-                total_area = sum(r**2 for _, _, r in group)
-                new_x = sum(x * r**2 for x, y, r in group) / total_area
-                new_y = sum(y * r**2 for x, y, r in group) / total_area
-                
-                # Calculate new radius to encompass all clusters
-                new_radius = max(
-                    np.sqrt((x - new_x)**2 + (y - new_y)**2) + r
-                    for x, y, r in group
-                )
-                
-                merged.append((new_x, new_y, new_radius))
+        points = np.asarray(clusters, dtype=np.float64)
+        x, y, r = (np.ascontiguousarray(points[:, k]) for k in range(3))
+        if numba is not None:
+            num_groups, labels = _overlap_labels(x, y, r)
+        else:
+            dx = x[:, None] - x[None, :]
+            dy = y[:, None] - y[None, :]
+            overlap = dx * dx + dy * dy < (r[:, None] + r[None, :]) ** 2
+            num_groups, labels = connected_components(csr_matrix(overlap), directed=False)
         
+        # Center is the area-weighted average of the group's centers
+        area = r * r
+        total_area = np.bincount(labels, weights=area, minlength=num_groups)
+        new_x = np.bincount(labels, weights=x * area, minlength=num_groups) / total_area
+        new_y = np.bincount(labels, weights=y * area, minlength=num_groups) / total_area
+        
+        # Radius encompasses every circle of the group
+        reach = np.sqrt((x - new_x[labels]) ** 2 + (y - new_y[labels]) ** 2) + r
+        new_radius = np.zeros(num_groups)
+        np.maximum.at(new_radius, labels, reach)
+        
+        sizes = np.bincount(labels, minlength=num_groups)
+        _, first = np.unique(labels, return_index=True)
+        merged = []
+        for index in np.sort(first):
+            group = labels[index]
+            if sizes[group] == 1:
+                merged.append(clusters[index])
+            else:
+                merged.append((float(new_x[group]), float(new_y[group]), float(new_radius[group])))
         return merged
 
+    @staticmethod
+    def _scratch(name, shape, dtype):
+        """
+        Scratch array of the given shape, reusing this thread's largest one so far
+        
+        The contents are undefined and only valid until the next call with the
+        same name on the same thread.
+        """
+        size = int(np.prod(shape))
+        buffer = getattr(ImageDiff._buffers, name, None)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = np.empty(size, dtype=dtype)
+            setattr(ImageDiff._buffers, name, buffer)
+        return buffer[:size].reshape(shape)
+
     @staticmethod
     def find_clusters(diff_matrix, min_cluster_size=10, merge_overlapping=True):
         """Find clusters of non-black pixels and return their centers and radii"""
-        clusters = []
+        plane_shape = diff_matrix.shape[:2]
         
         # Convert diff_matrix to binary (non-black vs black)
+        binary = ImageDiff._scratch('binary', plane_shape, np.bool_)
         if len(diff_matrix.shape) == 3:
             # Multi-channel: check if any channel is non-zero
-            binary = np.any(diff_matrix > 0, axis=2).astype(np.uint8)
+            if diff_matrix.dtype.kind != 'u':
+                diff_matrix = diff_matrix > 0
+            np.any(diff_matrix, axis=2, out=binary)
         else:
             # Single channel
-            binary = (diff_matrix > 0).astype(np.uint8)
-        
-        # Find connected components (clusters)
-        labeled, num_features = ndimage.label(binary)
+            np.greater(diff_matrix, 0, out=binary)
         
-        # Process each cluster
-        for cluster_id in range(1, num_features + 1):
-            # Find pixels belonging to this cluster
-            cluster_pixels = np.argwhere(labeled == cluster_id)
-            
-            # Skip small clusters
-            if len(cluster_pixels) < min_cluster_size:
-                continue
-            
-            # Get bounding box of the cluster
-            min_row, min_col = cluster_pixels.min(axis=0)
-            max_row, max_col = cluster_pixels.max(axis=0)
-            
-            # Calculate center and radius for the circle
-            center_y = (min_row + max_row) / 2
-            center_x = (min_col + max_col) / 2
+        # Find connected components (clusters) and their bounding boxes
+        labeled = ImageDiff._scratch('labels', plane_shape, np.int32)
+        if cv2 is not None:
+            # Labels, areas and boxes in one pass; 4-connectivity like ndimage.label
+            _, labeled, stats, _ = cv2.connectedComponentsWithStats(
+                binary.view(np.uint8), labels=labeled, connectivity=4, ltype=cv2.CV_32S
+            )
+            # Row 0 is the background
+            stats = stats[1:]
+            stats = stats[stats[:, cv2.CC_STAT_AREA] >= min_cluster_size]
+            min_row = stats[:, cv2.CC_STAT_TOP]
+            min_col = stats[:, cv2.CC_STAT_LEFT]
+            max_row = min_row + stats[:, cv2.CC_STAT_HEIGHT] - 1
+            max_col = min_col + stats[:, cv2.CC_STAT_WIDTH] - 1
+        else:
+            num_features = ndimage.label(binary, output=labeled)
             
-            # Radius is the maximum distance from center to any corner, plus some padding
-            radius = max(
-                np.sqrt((max_row - center_y)**2 + (max_col - center_x)**2),
-                np.sqrt((min_row - center_y)**2 + (min_col - center_x)**2)
-            ) * 1.2  # Add 20% padding
+            # Bounding boxes and pixel counts of all clusters in one pass each
+            slices = ndimage.find_objects(labeled)
+            sizes = ndimage.sum(binary, labeled, index=np.arange(1, num_features + 1))
             
-            clusters.append((center_x, center_y, radius))
+            # Skip small clusters
+            boxes = np.array(
+                [(rows.start, rows.stop - 1, cols.start, cols.stop - 1)
+                 for (rows, cols), size in zip(slices, sizes) if size >= min_cluster_size],
+                dtype=np.int64
+            ).reshape(-1, 4)
+            min_row, max_row, min_col, max_col = boxes.T
+        
+        # Calculate center and radius for each circle
+        center_y = (min_row + max_row) / 2
+        center_x = (min_col + max_col) / 2
+        
+        # Radius is the maximum distance from center to any corner, plus some padding
+        radius = np.maximum(
+            np.hypot(max_row - center_y, max_col - center_x),
+            np.hypot(min_row - center_y, min_col - center_x)
+        ) * 1.2  # Add 20% padding
+        
+        clusters = list(zip(center_x.tolist(), center_y.tolist(), radius.tolist()))
         
         # Merge overlapping clusters if requested
         if merge_overlapping:
@@ -170,10 +312,15 @@ class ImageDiff:
         return clusters
 
     @staticmethod
-    def draw_circles(image, clusters, circle_color=(255, 0, 0), circle_width=2):
-        """Draw circles on an image at specified locations"""
+    def draw_circles(image, clusters, circle_color=(255, 0, 0), circle_width=2, inplace=False):
+        """
+        Draw circles on an image at specified locations
+        
+        With inplace=True the circles are drawn on image itself, which is
+        modified and returned, instead of on a copy.
+        """
         # Create a copy of the image to draw on
-        result_image = image.copy()
+        result_image = image if inplace else image.copy()
         draw = ImageDraw.Draw(result_image)
         
         # Draw each circle
@@ -188,11 +335,25 @@ class ImageDiff:
         
         return result_image
 
+    def _decode_both(self):
+        """Get the pixels of both images, decoding two PIL images concurrently"""
+        if isinstance(self.image, np.ndarray) or isinstance(self.new_image, np.ndarray):
+            return ImageDiff.get_pixels(self.image), ImageDiff.get_pixels(self.new_image)
+        
+        # PIL releases the GIL while decoding, so the two decodes overlap
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(ImageDiff.get_pixels, self.image)
+            matrix2 = ImageDiff.get_pixels(self.new_image)
+            return future.result(), matrix2
+
     def run(self):
         """Run the image difference detection pipeline"""
-        matrix1, matrix2 = ImageDiff.get_pixels(self.image), ImageDiff.get_pixels(self.new_image)
+        matrix1, matrix2 = self._decode_both()
+        if np.array_equal(matrix1, matrix2):
+            # Identical renders, nothing to diff
+            return []
+        
+        # The diff is local to this run, so it is thresholded in place
         diff = ImageDiff.get_pixel_difference(matrix1, matrix2)
-        diff_low_pass = ImageDiff.threshold_diff(diff)
-        diff_image = ImageDiff.matrix_to_image(diff)
-        clusters = ImageDiff.find_clusters(diff_low_pass)
-        return clusters
+        diff_low_pass = ImageDiff.threshold_diff(diff, out=diff)
+        return ImageDiff.find_clusters(diff_low_pass)
@@ -3,25 +3,143 @@ LaTeX Compiler utility
 Compiles LaTeX documents and captures errors
 """
 import os
+import logging
 import subprocess
 import re
+import shutil
+import bisect
+import glob
+import hashlib
+import functools
+import sqlite3
+import tempfile
+import threading
 from pathlib import Path
 from typing import Tuple, List, Optional, Dict
 
+from . import fast_json
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger(__name__)
+
+# Scratch compilations go to tmpfs when the system has one
+_SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# TeX hard-wraps log and terminal lines at max_print_line characters
+_MAX_PRINT_LINE = 79
+
+_AUX_EXTENSIONS = frozenset({'.aux', '.log', '.out', '.toc', '.fls', '.fdb_latexmk', '.synctex.gz'})
+
+
+def _compile_log_pattern(pattern: str):
+    """Compile a pattern for scanning compiler output, with RE2 (linear time) when installed"""
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            pass
+    return re.compile(pattern)
+
+
+# General errors without line numbers: ! Error message
+_GENERAL_ERROR_PATTERN = _compile_log_pattern(r'(?m)!\s*(.*?)(?:\n|$)')
+
+
+def _unwrap_line(output: str, line_starts: List[int], end: int) -> str:
+    """
+    Text TeX wrapped onto the lines following the one ending at end
+    
+    Args:
+        output: Compilation output text
+        line_starts: Offsets of the output's line starts (0 included)
+        end: Offset where a matched line ends (its newline, or the end of output)
+        
+    Returns:
+        The continuation lines joined without separators ('' if the line wasn't wrapped)
+    """
+    row = bisect.bisect_right(line_starts, end) - 1
+    pieces = []
+    while end - line_starts[row] == _MAX_PRINT_LINE and row + 1 < len(line_starts):
+        row += 1
+        end = line_starts[row + 1] - 1 if row + 1 < len(line_starts) else len(output)
+        pieces.append(output[line_starts[row]:end])
+    return ''.join(pieces)
+
+
+@functools.lru_cache(maxsize=64)
+def _file_error_pattern(filename: str):
+    """Compiled pattern for file-line-error messages of a file: ./file.tex:123: Error message"""
+    return _compile_log_pattern(r'(?m)(?:\./)?' + re.escape(filename) + r':(\d+):\s*(.*?)(?:\n|$)')
+
 
 class LatexCompiler:
     """Compiles LaTeX documents and extracts compilation errors"""
     
-    def __init__(self, compiler: str = "xelatex", output_dir: Optional[str] = None):
+    def __init__(
+        self,
+        compiler: str = "xelatex",
+        output_dir: Optional[str] = None,
+        precompile_preamble: bool = True,
+        niceness: int = 0,
+        cpu_cores: Optional[str] = None,
+        cache_dir: Optional[str] = None
+    ):
         """
         Initialize LaTeX compiler
         
         Args:
             compiler: LaTeX compiler to use (xelatex, pdflatex, lualatex)
             output_dir: Directory where compilation should happen
+            precompile_preamble: Dump preambles passed to compile_source() into a
+                                 format file (needs the mylatexformat package) so
+                                 later compilations skip loading the packages
+            niceness: Nice increment for compiler processes, so they yield the CPU
+                      to the pipeline's own threads (0 = unchanged)
+            cpu_cores: CPU list for the compiler processes in taskset format
+                       (e.g. "2-3"), keeping them off the pipeline's cores
+            cache_dir: Directory for a persistent cache of successful
+                       compile_source() results keyed by source hash, so documents
+                       known to compile aren't compiled again, across runs too
+                       (None = no cache)
         """
         self.compiler = compiler
         self.output_dir = output_dir
+        self.precompile_preamble = precompile_preamble
+        
+        # Scheduling wrappers put in front of every compiler command; both tools
+        # are optional and skipped when not installed
+        self._launcher: List[str] = []
+        if cpu_cores:
+            if shutil.which("taskset"):
+                self._launcher += ["taskset", "-c", str(cpu_cores)]
+            else:
+                print(f"⚠️ taskset not found - not pinning {compiler} to CPUs {cpu_cores}")
+        if niceness:
+            if shutil.which("nice"):
+                self._launcher += ["nice", "-n", str(niceness)]
+            else:
+                print(f"⚠️ nice not found - running {compiler} at normal priority")
+        
+        # preamble -> format name, or None if the format could not be built
+        self._formats: Dict[str, Optional[str]] = {}
+        self._format_dir: Optional[tempfile.TemporaryDirectory] = None
+        # Pages may be compiled from several threads; the format is built once
+        self._format_lock = threading.Lock()
+        
+        self._cache_db: Optional[sqlite3.Connection] = None
+        self._cache_lock = threading.Lock()
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._cache_db = sqlite3.connect(
+                os.path.join(cache_dir, "compile_cache.sqlite3"), check_same_thread=False
+            )
+            self._cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB NOT NULL)"
+            )
     
     def compile(self, tex_file: str, clean_aux: bool = True) -> Tuple[bool, str, List[Dict[str, str]]]:
         """
@@ -44,23 +162,165 @@ class LatexCompiler:
         # Determine working directory
         work_dir = self.output_dir or tex_path.parent
         
+        success, output, errors = self._run(tex_path, work_dir)
+        
+        # Clean auxiliary files if requested
+        if clean_aux and success:
+            self._clean_aux_files(Path(work_dir), tex_path.stem)
+        
+        return success, output, errors
+    
+    def compile_source(
+        self,
+        source: str,
+        jobname: str = "test",
+        preamble: Optional[str] = None
+    ) -> Tuple[bool, str, List[Dict[str, str]]]:
+        """
+        Compile a LaTeX document held in memory
+        
+        The source and everything the compiler writes next to it go to a scratch
+        directory (on tmpfs when available) that is removed as a whole afterwards,
+        so test compilations never touch the output directory.
+        
+        Args:
+            source: Complete LaTeX document
+            jobname: Base name for the .tex file, shown in error messages
+            preamble: Leading part of source shared by many documents; with
+                      precompile_preamble it is loaded from a cached format
+            
+        Returns:
+            Tuple of (success, output, errors), as for compile()
+        """
+        key = None
+        if self._cache_db is not None:
+            key = hashlib.blake2b(
+                "\0".join((self.compiler, jobname, source)).encode('utf-8'), digest_size=16
+            ).hexdigest()
+            cached = self._cached_result(key)
+            if cached is not None:
+                logger.info(f"♻️ {jobname}.tex compiled before - reusing the result")
+                return cached
+        
+        fmt = None
+        if preamble and self.precompile_preamble and source.startswith(preamble):
+            fmt = self._preamble_format(preamble)
+            if fmt:
+                # mylatexformat formats resume reading the document after \endofdump;
+                # it shares a line with what follows so error line numbers don't shift
+                source = preamble + "\\endofdump " + source[len(preamble):]
+        
+        with tempfile.TemporaryDirectory(prefix="latex_", dir=_SCRATCH_DIR) as work_dir:
+            tex_path = Path(work_dir) / f"{jobname}.tex"
+            tex_path.write_text(source, encoding='utf-8')
+            result = self._run(tex_path, work_dir, fmt=fmt)
+        
+        # Only successes are kept: a failure may come from the environment (a
+        # missing package, a timeout) rather than the source, and not recur
+        if key is not None and result[0]:
+            self._store_result(key, result)
+        return result
+    
+    def _cached_result(self, key: str) -> Optional[Tuple[bool, str, List[Dict[str, str]]]]:
+        """Look up a successful compile_source() result in the cache"""
+        with self._cache_lock:
+            row = self._cache_db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        success, output, errors = fast_json.loads(row[0])
+        # Caches written by earlier versions also hold failures
+        if not success:
+            return None
+        return success, output, errors
+    
+    def _store_result(self, key: str, result: Tuple[bool, str, List[Dict[str, str]]]):
+        """Add a compile_source() result to the cache"""
+        with self._cache_lock, self._cache_db:
+            self._cache_db.execute(
+                "INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+                (key, fast_json.dumps_line(list(result)))
+            )
+    
+    def _preamble_format(self, preamble: str) -> Optional[str]:
+        """
+        Get the format file for a preamble, building it on first use
+        
+        Args:
+            preamble: Preamble to dump (everything before \\begin{document})
+            
+        Returns:
+            Format name to pass as -fmt, or None if it could not be built
+        """
+        with self._format_lock:
+            if preamble not in self._formats:
+                self._formats[preamble] = self._build_format(preamble)
+            return self._formats[preamble]
+    
+    def _build_format(self, preamble: str) -> Optional[str]:
+        """Dump a preamble into a format file in the scratch format directory"""
+        if self._format_dir is None:
+            self._format_dir = tempfile.TemporaryDirectory(prefix="latex_fmt_", dir=_SCRATCH_DIR)
+        name = "preamble_" + hashlib.blake2b(preamble.encode('utf-8'), digest_size=8).hexdigest()
+        format_dir = self._format_dir.name
+        
+        with open(os.path.join(format_dir, f"{name}.tex"), 'w', encoding='utf-8') as f:
+            f.write(preamble + "\\begin{document}\n\\end{document}\n")
+        cmd = self._launcher + [
+            self.compiler,
+            "-ini",
+            "-interaction=nonstopmode",
+            f"-jobname={name}",
+            f"&{self.compiler}",
+            "mylatexformat.ltx",
+            f"{name}.tex"
+        ]
+        try:
+            subprocess.run(cmd, cwd=format_dir, capture_output=True, text=True, timeout=120)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        
+        fmt = name if os.path.exists(os.path.join(format_dir, f"{name}.fmt")) else None
+        if fmt:
+            print(f"⚡ Precompiled preamble into {name}.fmt")
+        else:
+            print(f"⚠️ Could not precompile the preamble (is mylatexformat installed?) - compiling it every time")
+        return fmt
+    
+    def _run(self, tex_path: Path, work_dir, fmt: Optional[str] = None) -> Tuple[bool, str, List[Dict[str, str]]]:
+        """
+        Run the compiler on a .tex file and parse its output
+        
+        Args:
+            tex_path: Path of the .tex file (passed to the compiler by name)
+            work_dir: Directory the compiler runs in
+            fmt: Precompiled format from _preamble_format() to start from
+            
+        Returns:
+            Tuple of (success, output, errors), as for compile()
+        """
         # Build compilation command
         # Use -interaction=nonstopmode to not stop on errors
         # Use -halt-on-error to stop at first error but still get output
-        cmd = [
-            self.compiler,
+        cmd = self._launcher + [self.compiler]
+        env = None
+        if fmt:
+            cmd.append(f"-fmt={fmt}")
+            # Trailing separator keeps the default format search path
+            env = dict(os.environ, TEXFORMATS=self._format_dir.name + os.pathsep)
+        cmd += [
             "-interaction=nonstopmode",
             "-file-line-error",
             tex_path.name
         ]
         
         try:
-            print(f"🔨 Compiling {tex_path.name} with {self.compiler}...")
+            logger.info(f"🔨 Compiling {tex_path.name} with {self.compiler}...")
             
             # Run compilation
             result = subprocess.run(
                 cmd,
                 cwd=work_dir,
+                env=env,
                 capture_output=True,
                 text=True,
                 timeout=60
@@ -75,23 +335,19 @@ class LatexCompiler:
             success = result.returncode == 0 and len(errors) == 0
             
             if success:
-                print(f"✅ Compilation successful!")
+                logger.info(f"✅ Compilation successful!")
             else:
-                print(f"❌ Compilation failed with {len(errors)} error(s)")
-            
-            # Clean auxiliary files if requested
-            if clean_aux and success:
-                self._clean_aux_files(work_dir, tex_path.stem)
+                logger.error(f"❌ Compilation failed with {len(errors)} error(s)")
             
             return success, output, errors
             
         except subprocess.TimeoutExpired:
             error_msg = "Compilation timeout (>60s)"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             return False, error_msg, [{"line": "N/A", "message": error_msg, "context": ""}]
         except Exception as e:
             error_msg = f"Compilation error: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error(f"❌ {error_msg}")
             return False, error_msg, [{"line": "N/A", "message": str(e), "context": ""}]
     
     def _parse_errors(self, output: str, filename: str) -> List[Dict[str, str]]:
@@ -106,16 +362,12 @@ class LatexCompiler:
             List of error dictionaries
         """
         errors = []
+        # Offsets of line starts, shared by every _extract_context() call
+        line_starts = [0] + [m.end() for m in re.finditer('\n', output)]
         
-        # Pattern for file-line-error format: ./file.tex:123: Error message
-        error_pattern = re.compile(
-            r'(?:\./)?' + re.escape(filename) + r':(\d+):\s*(.*?)(?:\n|$)',
-            re.MULTILINE
-        )
-        
-        for match in error_pattern.finditer(output):
+        for match in _file_error_pattern(filename).finditer(output):
             line_num = match.group(1)
-            message = match.group(2).strip()
+            message = (match.group(2) + _unwrap_line(output, line_starts, match.end(2))).strip()
             
             # Skip some non-critical messages
             if any(skip in message.lower() for skip in ['warning', 'overfull', 'underfull']):
@@ -124,25 +376,32 @@ class LatexCompiler:
             errors.append({
                 "line": line_num,
                 "message": message,
-                "context": self._extract_context(output, match.start())
+                "context": self._extract_context(output, match.start(), line_starts=line_starts)
             })
         
         # Also look for general errors without line numbers
-        general_error_pattern = re.compile(r'!\s*(.*?)(?:\n|$)', re.MULTILINE)
-        for match in general_error_pattern.finditer(output):
-            error_msg = match.group(1).strip()
+        seen_messages = {err['message'] for err in errors}
+        for match in _GENERAL_ERROR_PATTERN.finditer(output):
+            error_msg = (match.group(1) + _unwrap_line(output, line_starts, match.end(1))).strip()
             
             # Avoid duplicates
-            if not any(err['message'] == error_msg for err in errors):
+            if error_msg not in seen_messages:
+                seen_messages.add(error_msg)
                 errors.append({
                     "line": "?",
                     "message": error_msg,
-                    "context": self._extract_context(output, match.start())
+                    "context": self._extract_context(output, match.start(), line_starts=line_starts)
                 })
         
         return errors
     
-    def _extract_context(self, output: str, error_pos: int, context_lines: int = 3) -> str:
+    def _extract_context(
+        self,
+        output: str,
+        error_pos: int,
+        context_lines: int = 3,
+        line_starts: Optional[List[int]] = None
+    ) -> str:
         """
         Extract context around an error position in the output
         
@@ -150,14 +409,19 @@ class LatexCompiler:
             output: Full compilation output
             error_pos: Position of error in output
             context_lines: Number of lines to include before/after
+            line_starts: Offsets of the output's line starts (0 included), to
+                         avoid rescanning the output for every error
             
         Returns:
             Context string
         """
-        lines = output[:error_pos + 500].split('\n')
+        if line_starts is None:
+            line_starts = [0] + [m.end() for m in re.finditer('\n', output)]
+        end = min(error_pos + 500, len(output))
         # Get last few lines before error
-        context = '\n'.join(lines[-context_lines-1:])
-        return context.strip()
+        lines_before_end = bisect.bisect_right(line_starts, end)
+        start = line_starts[max(0, lines_before_end - context_lines - 1)]
+        return output[start:end].strip()
     
     def _clean_aux_files(self, directory: Path, base_name: str):
         """
@@ -167,12 +431,10 @@ class LatexCompiler:
             directory: Directory containing the files
             base_name: Base name of the tex file (without extension)
         """
-        aux_extensions = ['.aux', '.log', '.out', '.toc', '.fls', '.fdb_latexmk', '.synctex.gz']
-        
-        for ext in aux_extensions:
-            aux_file = directory / f"{base_name}{ext}"
-            if aux_file.exists():
-                aux_file.unlink()
+        # One directory scan instead of a stat per extension
+        for aux_file in directory.glob(glob.escape(base_name) + ".*"):
+            if aux_file.name[len(base_name):] in _AUX_EXTENSIONS:
+                aux_file.unlink(missing_ok=True)
     
     def format_errors_for_ai(self, errors: List[Dict[str, str]], latex_code: str) -> str:
         """
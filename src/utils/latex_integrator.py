@@ -4,8 +4,23 @@ Cleans and integrates raw LaTeX into main document
 """
 import os
 import re
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sections are listed in this file next to the main document, which inputs it once
+SECTIONS_MANIFEST = "sections.tex"
+_MANIFEST_INPUT = f"\\input{{{os.path.splitext(SECTIONS_MANIFEST)[0]}}}"
+_RE_INPUT_LINE = re.compile(r'^\\input\{([^}]*)\}\n+', re.MULTILINE)
+# Page sections written by the pipeline are named <prefix>_page<N>.tex
+_RE_PAGE_SECTION = re.compile(r'.+_page\d+')
+
+# Patterns used to clean raw LaTeX
+_RE_PREAMBLE = re.compile(r'\\documentclass.*?\\begin\{document\}', re.DOTALL | re.IGNORECASE)
+_RE_END_DOCUMENT = re.compile(r'\\end\{document\}', re.IGNORECASE)
+_RE_BLANK_LINES = re.compile(r'\n{3,}')
 
 
 class LatexIntegrator:
@@ -13,6 +28,8 @@ class LatexIntegrator:
     
     def __init__(self, output_dir: str = "output/latex"):
         self.output_dir = output_dir
+        # Manifest path -> ((size, mtime_ns) when read, \input lines it contains)
+        self._manifest_inputs: Dict[str, Tuple[Tuple[int, int], Set[str]]] = {}
         Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     def clean_latex(self, raw_latex: str, remove_preamble: bool = True) -> str:
@@ -20,18 +37,13 @@ class LatexIntegrator:
 
         if remove_preamble:
             # Remove document class and preamble (case-insensitive, all occurrences)
-            raw_latex = re.sub(
-                r'\\documentclass.*?\\begin\{document\}',
-                '',
-                raw_latex,
-                flags=re.DOTALL | re.IGNORECASE
-            )
+            raw_latex = _RE_PREAMBLE.sub('', raw_latex)
             # Remove end document (case-insensitive, all occurrences)
-            raw_latex = re.sub(r'\\end\{document\}', '', raw_latex, flags=re.IGNORECASE)
+            raw_latex = _RE_END_DOCUMENT.sub('', raw_latex)
 
         
         # Clean up excessive whitespace
-        raw_latex = re.sub(r'\n{3,}', '\n\n', raw_latex)
+        raw_latex = _RE_BLANK_LINES.sub('\n\n', raw_latex)
         
         return raw_latex.strip()
     
@@ -55,7 +67,7 @@ class LatexIntegrator:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(cleaned_latex)
         
-        print(f"✓ Saved LaTeX to {output_path}")
+        logger.info(f"✓ Saved LaTeX to {output_path}")
         return output_path
     
     def create_main_document(
@@ -90,18 +102,16 @@ class LatexIntegrator:
         if title:
             doc_content += r"\maketitle" + "\n\n"
         
-        # Add input statements for each section
-        for section_file in section_files:
-            # Use relative path from main document
-            rel_path = os.path.relpath(section_file, os.path.dirname(output_path))
-            # Remove .tex extension for \input
-            rel_path_no_ext = os.path.splitext(rel_path)[0]
-            doc_content += f"\\input{{{rel_path_no_ext}}}\n\n"
-        
+        # Sections are listed in the manifest, which the document inputs once
+        doc_content += f"{_MANIFEST_INPUT}\n\n"
         doc_content += r"\end{document}"
         
-        # Save main document
+        # Save main document and the section manifest
         Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+        with open(self._manifest_path(output_path), 'w', encoding='utf-8') as f:
+            f.write("".join(
+                f"{self._input_statement(section_file, output_path)}\n\n" for section_file in section_files
+            ))
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(doc_content)
         
@@ -118,6 +128,10 @@ class LatexIntegrator:
         """
         Append a section to an existing main document, or create it if it doesn't exist
         
+        The main document only inputs the section manifest (sections.tex next to
+        it); sections are appended to the manifest, so the main document is
+        written once instead of being rewritten for every page.
+        
         Args:
             section_file: Path to the section file to append
             main_doc_path: Path to the main document
@@ -155,6 +169,7 @@ class LatexIntegrator:
             if title:
                 doc_content += r"\maketitle" + "\n\n"
             
+            doc_content += f"{_MANIFEST_INPUT}\n\n"
             doc_content += r"\end{document}"
             
             # Ensure directory exists
@@ -163,7 +178,90 @@ class LatexIntegrator:
             with open(main_doc_path, 'w', encoding='utf-8') as f:
                 f.write(doc_content)
         
-        # Read current content
+        manifest_path = self._manifest_path(main_doc_path)
+        if not os.path.exists(manifest_path):
+            self._migrate_main_document(main_doc_path, manifest_path)
+        
+        included = self._included_inputs(manifest_path)
+        
+        # Check if this section is already included
+        input_statement = self._input_statement(section_file, main_doc_path)
+        if input_statement in included:
+            # Section already included, don't duplicate
+            return main_doc_path
+        
+        with open(manifest_path, 'a', encoding='utf-8') as f:
+            f.write(f"{input_statement}\n\n")
+            f.flush()
+            stat = os.fstat(f.fileno())
+        included.add(input_statement)
+        self._manifest_inputs[manifest_path] = ((stat.st_size, stat.st_mtime_ns), included)
+        
+        return main_doc_path
+    
+    def _included_inputs(self, manifest_path: str) -> Set[str]:
+        """
+        \input lines of a section manifest, read only when the file changed
+        
+        Args:
+            manifest_path: Path of the manifest
+            
+        Returns:
+            Set of the manifest's \input statements (cached, updated in place)
+        """
+        stat = os.stat(manifest_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._manifest_inputs.get(manifest_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            included = {f"\\input{{{path}}}" for path in _RE_INPUT_LINE.findall(f.read())}
+        self._manifest_inputs[manifest_path] = (signature, included)
+        return included
+    
+    @staticmethod
+    def _manifest_path(main_doc_path: str) -> str:
+        """Path of the section manifest belonging to a main document"""
+        return os.path.join(os.path.dirname(main_doc_path), SECTIONS_MANIFEST)
+    
+    @staticmethod
+    def _input_statement(section_file: str, main_doc_path: str) -> str:
+        """\\input line for a section, relative to the main document and without .tex"""
+        rel_path = os.path.relpath(section_file, os.path.dirname(main_doc_path))
+        return f"\\input{{{os.path.splitext(rel_path)[0]}}}"
+    
+    def _is_page_section(self, path: str, main_doc_path: str) -> bool:
+        """
+        Whether an \\input path of a main document is a page section of this integrator
+        
+        Args:
+            path: Path inside the \\input{}, relative to the main document
+            main_doc_path: Path to the main document
+            
+        Returns:
+            True for <prefix>_page<N> files in output_dir, False for anything else
+            (e.g. user-added macro files)
+        """
+        section_path = os.path.join(os.path.dirname(main_doc_path), path)
+        return (
+            _RE_PAGE_SECTION.fullmatch(os.path.basename(path)) is not None
+            and os.path.dirname(os.path.abspath(section_path)) == os.path.abspath(self.output_dir)
+        )
+    
+    def _migrate_main_document(self, main_doc_path: str, manifest_path: str):
+        """
+        Move the page section \\input lines of a main document into a new section manifest
+        
+        Main documents written before the manifest existed listed every page
+        section themselves; those \\input lines are moved to the manifest and
+        replaced by a single input of it. Other \\input lines, such as macro
+        files added to the preamble, stay where they are.
+        
+        Args:
+            main_doc_path: Path to the main document
+            manifest_path: Path of the manifest to create
+        """
         with open(main_doc_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
@@ -173,25 +271,19 @@ class LatexIntegrator:
         if end_doc_pos == -1:
             raise ValueError(f"Invalid main document: missing \\end{{document}} in {main_doc_path}")
         
-        # Calculate relative path from main document to section file
-        rel_path = os.path.relpath(section_file, os.path.dirname(main_doc_path))
-        rel_path_no_ext = os.path.splitext(rel_path)[0]
-        
-        # Check if this section is already included
-        input_statement = f"\\input{{{rel_path_no_ext}}}"
-        if input_statement in content:
-            # Section already included, don't duplicate
-            return main_doc_path
+        body = content[:end_doc_pos]
+        inputs = [
+            f"\\input{{{path}}}\n\n"
+            for path in _RE_INPUT_LINE.findall(body)
+            if self._is_page_section(path, main_doc_path)
+        ]
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            f.write("".join(inputs))
         
-        # Insert the new \input statement before \end{document}
-        new_content = (
-            content[:end_doc_pos] +
-            f"{input_statement}\n\n" +
-            content[end_doc_pos:]
-        )
-        
-        # Write updated content
-        with open(main_doc_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        return main_doc_path
+        if _MANIFEST_INPUT not in content:
+            body = _RE_INPUT_LINE.sub(
+                lambda m: '' if self._is_page_section(m.group(1), main_doc_path) else m.group(0),
+                body
+            )
+            with open(main_doc_path, 'w', encoding='utf-8') as f:
+                f.write(body + f"{_MANIFEST_INPUT}\n\n" + content[end_doc_pos:])
@@ -1,65 +1,80 @@
 """
-Rate Limiter using sliding window algorithm
+Token-bucket rate limiter
+Thread-safe, and shared by blocking and asyncio callers alike
 """
 import time
-from collections import deque
+import asyncio
+import logging
+import threading
 from typing import Dict
 
+logger = logging.getLogger(__name__)
+
 
 class RateLimiter:
-    """Rate limiter using sliding window algorithm"""
+    """Token-bucket rate limiter for threads, also awaitable from asyncio tasks"""
     
     def __init__(self, max_requests: int, time_window: int):
         """
         Initialize rate limiter
         
         Args:
-            max_requests: Maximum number of requests allowed
-            time_window: Time window in seconds
+            max_requests: Maximum number of requests allowed (bucket capacity)
+            time_window: Time window in seconds over which max_requests refill
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = deque()
+        self._rate = max_requests / time_window
+        self._tokens = float(max_requests)
+        self._last = time.monotonic()
+        # Serializes callers from the pipeline's conversion threads and event
+        # loop; only held for the bookkeeping, never while waiting
+        self._lock = threading.Lock()
     
-    def wait_if_needed(self):
-        """Wait if rate limit would be exceeded"""
-        now = time.time()
-        
-        # Remove requests outside the time window
-        while self.requests and self.requests[0] <= now - self.time_window:
-            self.requests.popleft()
-        
-        # Check if we need to wait
-        if len(self.requests) >= self.max_requests:
-            # Calculate how long to wait
-            oldest_request = self.requests[0]
-            wait_time = self.time_window - (now - oldest_request)
-            
-            if wait_time > 0:
-                print(f"⏳ Rate limit reached. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time + 0.1)  # Add small buffer
-                
-                # Clean up old requests after waiting
-                now = time.time()
-                while self.requests and self.requests[0] <= now - self.time_window:
-                    self.requests.popleft()
+    def _refill(self, now: float):
+        """Add the tokens accumulated since the last refill; the caller holds the lock"""
+        self._tokens = min(self.max_requests, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+    
+    def _reserve(self) -> float:
+        """
+        Take a token, ahead of time if the bucket is empty
         
-        # Record this request
-        self.requests.append(time.time())
+        Tokens below zero are owed to earlier callers, so reservations are
+        handed out in FIFO order without anyone holding the lock while waiting.
         
+        Returns:
+            Seconds to wait before the token may be used
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate)
+    
+    def wait_if_needed(self):
+        """Wait if rate limit would be exceeded"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.info(f"⏳ Rate limit reached. Waiting {wait_time:.1f} seconds...")
+            time.sleep(wait_time)
+    
+    async def acquire(self):
+        """Wait until a token is available and take it, without blocking the event loop"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.info(f"⏳ Rate limit reached. Waiting {wait_time:.1f} seconds...")
+            await asyncio.sleep(wait_time)
+    
     def get_status(self) -> Dict:
         """Get current rate limiter status"""
-        now = time.time()
-        
-        # Clean up old requests
-        while self.requests and self.requests[0] <= now - self.time_window:
-            self.requests.popleft()
-        
-        remaining = self.max_requests - len(self.requests)
-        
-        return {
-            'requests_made': len(self.requests),
-            'max_requests': self.max_requests,
-            'remaining': remaining,
-            'window_seconds': self.time_window
-        }
+        with self._lock:
+            self._refill(time.monotonic())
+            remaining = max(0, int(self._tokens))
+            
+            return {
+                'requests_made': self.max_requests - remaining,
+                'max_requests': self.max_requests,
+                'remaining': remaining,
+                'window_seconds': self.time_window
+            }
+
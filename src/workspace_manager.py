@@ -3,15 +3,89 @@ Workspace Manager for organizing multiple document conversions
 Allows operating on different documents without specifying paths each time
 """
 import os
+import re
+import sys
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Any, Callable, Dict, Iterator, Optional, List, Set, Tuple
 from datetime import datetime
 
+from .utils import fast_json
+from .utils.checkpoint_manager import CheckpointManager
+
+# Workspace names: alphanumerics, dashes and underscores, with at least one alphanumeric
+_NAME_RE = re.compile(r'\A(?=[\w-]*[^\W_])[\w-]+\Z')
+
+# Parsed workspace files, per path: (mtime_ns, size, parsed content)
+_FILE_CACHE: Dict[str, Tuple[int, int, Any]] = {}
+
+
+def _read_cached(path: Path, parse: Callable[[bytes], Any], default: Any = None) -> Any:
+    """
+    Read and parse a file, reusing the last parse while its mtime and size are unchanged
+    
+    Args:
+        path: File to read
+        parse: Function turning the file's bytes into the cached value
+        default: Value returned when the file doesn't exist
+        
+    Returns:
+        Parsed content, shared with other readers (don't mutate it)
+    """
+    key = os.fspath(path)
+    try:
+        st = os.stat(key)
+    except FileNotFoundError:
+        _FILE_CACHE.pop(key, None)
+        return default
+    
+    cached = _FILE_CACHE.get(key)
+    if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+        with open(key, 'rb') as f:
+            cached = (st.st_mtime_ns, st.st_size, parse(f.read()))
+        _FILE_CACHE[key] = cached
+    return cached[2]
+
+
+def _remember(path: Path, value: Any):
+    """Record what was just written to a file so the next read needn't parse it"""
+    key = os.fspath(path)
+    st = os.stat(key)
+    _FILE_CACHE[key] = (st.st_mtime_ns, st.st_size, value)
+
+
+# Key of the current workspace's name in workspaces.json; not a valid workspace name
+CURRENT_KEY = "@current"
+# File that held the current workspace's name before it moved into workspaces.json
+_LEGACY_CURRENT_FILE = ".current"
+
+# Marks state that hasn't been loaded from disk yet
+_UNLOADED = object()
+
+
+def _copy_workspaces(workspaces: Dict) -> Dict:
+    """Copy of a workspaces dict deep enough to mutate workspace configs safely"""
+    return {name: dict(config) for name, config in workspaces.items()}
+
 
 class WorkspaceManager:
     """Manages workspaces for organizing multiple document conversion projects"""
     
+    __slots__ = (
+        'base_dir',
+        'config_file',
+        '_workspaces',
+        '_current_workspace',
+        '_buffer_depth',
+        '_dirty',
+        '_legacy_current',
+        '_paths_cache'
+    )
+    
+    # Directories already created (or found) by any manager in this process
+    _known_dirs: Set[str] = set()
+    
     def __init__(self, base_dir: str = "workspaces"):
         """
         Initialize workspace manager
@@ -20,37 +94,129 @@ class WorkspaceManager:
             base_dir: Base directory for all workspaces
         """
         self.base_dir = Path(base_dir)
-        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self.base_dir)
         self.config_file = self.base_dir / "workspaces.json"
-        self.workspaces = self._load_workspaces()
-        self.current_workspace = self._load_current_workspace()
+        # Loaded on first access, so commands that don't need them skip the reads
+        self._workspaces: Any = _UNLOADED
+        self._current_workspace: Any = _UNLOADED
+        # Whether the current workspace was read from the legacy .current file
+        self._legacy_current = False
+        # Saves deferred by buffered(): depth of nesting, and whether one is pending
+        self._buffer_depth = 0
+        self._dirty = False
+        # Workspace name -> paths from get_workspace_paths()
+        self._paths_cache: Dict[str, Dict[str, str]] = {}
     
-    def _load_workspaces(self) -> Dict:
-        """Load workspace configurations"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        return {}
+    @property
+    def workspaces(self) -> Dict:
+        """Workspace configurations by name, loaded on first access"""
+        if self._workspaces is _UNLOADED:
+            self._load_workspaces()
+        return self._workspaces
     
-    def _save_workspaces(self):
-        """Save workspace configurations"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.workspaces, f, indent=2)
+    @property
+    def current_workspace(self) -> Optional[str]:
+        """Name of the current workspace, loaded on first access"""
+        if self._current_workspace is _UNLOADED:
+            self._load_workspaces()
+        return self._current_workspace
+    
+    @current_workspace.setter
+    def current_workspace(self, name: Optional[str]):
+        self._current_workspace = name
+    
+    @classmethod
+    def _ensure_dir(cls, directory: Path):
+        """Create a directory and its parents, unless this process already did"""
+        key = os.fspath(directory)
+        if key not in cls._known_dirs:
+            os.makedirs(key, exist_ok=True)
+            cls._known_dirs.add(key)
+    
+    @contextmanager
+    def buffered(self) -> Iterator['WorkspaceManager']:
+        """
+        Defer saves made inside the block and write workspaces.json once when it ends
+        
+        Useful for batches of updates (e.g. bulk imports); blocks may be nested,
+        the outermost one writes.
+        """
+        self._buffer_depth += 1
+        try:
+            yield self
+        finally:
+            self._buffer_depth -= 1
+            if self._buffer_depth == 0:
+                self._flush()
     
-    def _load_current_workspace(self) -> Optional[str]:
-        """Load the current active workspace"""
-        current_file = self.base_dir / ".current"
-        if current_file.exists():
-            return current_file.read_text().strip()
-        return None
+    def _flush(self):
+        """Write the save deferred by buffered()"""
+        if self._dirty:
+            self._dirty = False
+            self._save_workspaces()
     
-    def _save_current_workspace(self, workspace_name: Optional[str]):
-        """Save the current active workspace"""
-        current_file = self.base_dir / ".current"
-        if workspace_name:
-            current_file.write_text(workspace_name)
-        elif current_file.exists():
-            current_file.unlink()
+    def _load_workspaces(self):
+        """
+        Load workspace configurations and the current workspace
+        
+        The workspaces dict is kept in access order, least recently accessed
+        first; files written by this class are already in that order.
+        """
+        data = _read_cached(self.config_file, fast_json.loads, default={})
+        workspaces = {name: config for name, config in data.items() if name != CURRENT_KEY}
+        self._workspaces = _copy_workspaces(dict(sorted(
+            workspaces.items(), key=lambda item: item[1].get('last_accessed', '')
+        )))
+        self._intern_strings()
+        
+        if self._current_workspace is _UNLOADED:
+            if CURRENT_KEY in data:
+                current = data[CURRENT_KEY]
+            else:
+                current = self._load_legacy_current_workspace()
+            self._current_workspace = sys.intern(current) if current else None
+    
+    def _intern_strings(self):
+        """Intern workspace names and statuses, which recur across lookups and configs"""
+        workspaces = {}
+        for name, config in self._workspaces.items():
+            for key in ('name', 'status'):
+                if isinstance(config.get(key), str):
+                    config[key] = sys.intern(config[key])
+            workspaces[sys.intern(name)] = config
+        self._workspaces = workspaces
+    
+    def _load_legacy_current_workspace(self) -> Optional[str]:
+        """Read the current workspace from a .current file left by older versions"""
+        try:
+            with open(self.base_dir / _LEGACY_CURRENT_FILE, 'r') as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        self._legacy_current = True
+        return name or None
+    
+    def _save_workspaces(self):
+        """Save workspace configurations, including the current workspace"""
+        if self._buffer_depth:
+            self._dirty = True
+            return
+        
+        data = {CURRENT_KEY: self.current_workspace, **self.workspaces}
+        # Serialize first so the file is written in one call, then swap it in
+        # atomically so a crash can't leave a truncated config behind
+        tmp_file = self.config_file.with_name(self.config_file.name + ".tmp")
+        tmp_file.write_bytes(json.dumps(data, indent=2).encode('utf-8'))
+        os.replace(tmp_file, self.config_file)
+        _remember(self.config_file, {CURRENT_KEY: data[CURRENT_KEY], **_copy_workspaces(self.workspaces)})
+        
+        if self._legacy_current:
+            # workspaces.json holds the current workspace now
+            try:
+                os.remove(self.base_dir / _LEGACY_CURRENT_FILE)
+            except FileNotFoundError:
+                pass
+            self._legacy_current = False
     
     def create_workspace(
         self, 
@@ -72,45 +238,51 @@ class WorkspaceManager:
             Workspace configuration dict
         """
         # Validate workspace name
-        if not name.replace('-', '').replace('_', '').isalnum():
+        if not _NAME_RE.match(name):
             raise ValueError("Workspace name must contain only alphanumeric characters, dashes, and underscores")
+        name = sys.intern(name)
         
         if name in self.workspaces:
             raise ValueError(f"Workspace '{name}' already exists")
         
         # Resolve PDF path
-        pdf_path = str(Path(pdf_path).resolve())
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        pdf_path = os.path.realpath(os.fspath(pdf_path))
+        try:
+            os.stat(pdf_path)
+        except OSError:
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}") from None
         
         # Create workspace directory structure
         workspace_dir = self.base_dir / name
-        workspace_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create subdirectories
-        (workspace_dir / "images").mkdir(exist_ok=True)
-        (workspace_dir / "latex").mkdir(exist_ok=True)
+        # Create subdirectories (and with them the workspace directory)
+        self._ensure_dir(workspace_dir / "images")
+        self._ensure_dir(workspace_dir / "latex")
         
         # Create workspace config
+        now = datetime.now().isoformat()
         workspace_config = {
             'name': name,
             'pdf_path': pdf_path,
             'workspace_dir': str(workspace_dir),
             'description': description,
-            'created_at': datetime.now().isoformat(),
-            'last_accessed': datetime.now().isoformat(),
+            'created_at': now,
+            'last_accessed': now,
             'status': 'created'
         }
         
-        self.workspaces[name] = workspace_config
-        self._save_workspaces()
-        
-        if set_as_current:
-            self.set_current_workspace(name)
+        with self.buffered():
+            self.workspaces[name] = workspace_config
+            self._save_workspaces()
+            
+            if set_as_current:
+                self.set_current_workspace(name)
         
-        print(f"✅ Created workspace '{name}'")
-        print(f"   PDF: {pdf_path}")
-        print(f"   Location: {workspace_dir}")
+        print(
+            f"✅ Created workspace '{name}'\n"
+            f"   PDF: {pdf_path}\n"
+            f"   Location: {workspace_dir}"
+        )
         
         return workspace_config
     
@@ -119,11 +291,10 @@ class WorkspaceManager:
         if name not in self.workspaces:
             raise ValueError(f"Workspace '{name}' does not exist")
         
-        self.current_workspace = name
-        self._save_current_workspace(name)
+        self.current_workspace = sys.intern(name)
         
         # Update last accessed time
-        self.workspaces[name]['last_accessed'] = datetime.now().isoformat()
+        self._touch(name)
         self._save_workspaces()
         
         print(f"📂 Switched to workspace '{name}'")
@@ -140,19 +311,12 @@ class WorkspaceManager:
     
     def list_workspaces(self) -> List[Dict]:
         """List all workspaces"""
-        workspaces_list = []
-        for name, config in self.workspaces.items():
-            config_copy = config.copy()
-            config_copy['is_current'] = (name == self.current_workspace)
-            workspaces_list.append(config_copy)
-        
-        # Sort by last accessed time (most recent first)
-        workspaces_list.sort(
-            key=lambda x: x.get('last_accessed', ''), 
-            reverse=True
-        )
-        
-        return workspaces_list
+        # Most recently accessed first; self.workspaces is kept in access order
+        current = self.current_workspace
+        return [
+            dict(config, is_current=(name == current))
+            for name, config in reversed(self.workspaces.items())
+        ]
     
     def delete_workspace(self, name: str, delete_files: bool = False):
         """
@@ -167,19 +331,25 @@ class WorkspaceManager:
         
         workspace_dir = Path(self.workspaces[name]['workspace_dir'])
         
-        # Remove from config
-        del self.workspaces[name]
-        self._save_workspaces()
-        
-        # Clear current workspace if it was deleted
-        if self.current_workspace == name:
-            self.current_workspace = None
-            self._save_current_workspace(None)
+        with self.buffered():
+            # Remove from config
+            del self.workspaces[name]
+            self._paths_cache.pop(name, None)
+            self._save_workspaces()
+            
+            # Clear current workspace if it was deleted
+            if self.current_workspace == name:
+                self.current_workspace = None
         
         # Optionally delete files
         if delete_files and workspace_dir.exists():
             import shutil
             shutil.rmtree(workspace_dir)
+            prefix = os.fspath(workspace_dir) + os.sep
+            WorkspaceManager._known_dirs = {
+                d for d in WorkspaceManager._known_dirs
+                if d != os.fspath(workspace_dir) and not d.startswith(prefix)
+            }
             print(f"🗑️  Deleted workspace '{name}' and its files")
         else:
             print(f"🗑️  Deleted workspace '{name}' (files preserved)")
@@ -189,10 +359,16 @@ class WorkspaceManager:
         if name not in self.workspaces:
             raise ValueError(f"Workspace '{name}' does not exist")
         
-        self.workspaces[name]['status'] = status
-        self.workspaces[name]['last_accessed'] = datetime.now().isoformat()
+        self.workspaces[name]['status'] = sys.intern(status)
+        self._touch(name)
         self._save_workspaces()
     
+    def _touch(self, name: str):
+        """Update a workspace's last accessed time and move it to the end of the access order"""
+        config = self.workspaces.pop(name)
+        config['last_accessed'] = datetime.now().isoformat()
+        self.workspaces[name] = config
+    
     def get_workspace_paths(self, name: Optional[str] = None) -> Dict[str, str]:
         """
         Get all relevant paths for a workspace
@@ -213,16 +389,24 @@ class WorkspaceManager:
         if name not in self.workspaces:
             raise ValueError(f"Workspace '{name}' does not exist")
         
-        config = self.workspaces[name]
-        workspace_dir = Path(config['workspace_dir'])
+        paths = self._paths_cache.get(name)
+        if paths is None:
+            paths = self._paths_cache[name] = self._build_workspace_paths(self.workspaces[name])
+        return dict(paths)
+    
+    @staticmethod
+    def _build_workspace_paths(config: Dict) -> Dict[str, str]:
+        """Paths of a workspace, derived from its configuration"""
+        # Stored as str(Path), so plain string joins give the same paths
+        workspace_dir = config['workspace_dir']
         
         return {
-            'workspace_dir': str(workspace_dir),
+            'workspace_dir': workspace_dir,
             'pdf_path': config['pdf_path'],
-            'images_dir': str(workspace_dir / "images"),
-            'latex_dir': str(workspace_dir / "latex"),
-            'checkpoint_file': str(workspace_dir / "checkpoint.json"),
-            'main_doc': str(workspace_dir / "main.tex")
+            'images_dir': os.path.join(workspace_dir, "images"),
+            'latex_dir': os.path.join(workspace_dir, "latex"),
+            'checkpoint_file': os.path.join(workspace_dir, "checkpoint.json"),
+            'main_doc': os.path.join(workspace_dir, "main.tex")
         }
     
     def print_workspace_info(self, name: Optional[str] = None):
@@ -241,23 +425,35 @@ class WorkspaceManager:
         config = self.workspaces[name]
         is_current = (name == self.current_workspace)
         
-        print(f"\n{'='*60}")
-        print(f"Workspace: {name} {'(CURRENT)' if is_current else ''}")
-        print(f"{'='*60}")
-        print(f"Description: {config.get('description', 'N/A')}")
-        print(f"PDF: {config['pdf_path']}")
-        print(f"Location: {config['workspace_dir']}")
-        print(f"Status: {config.get('status', 'unknown')}")
-        print(f"Created: {config.get('created_at', 'N/A')}")
-        print(f"Last accessed: {config.get('last_accessed', 'N/A')}")
-        
-        # Check if checkpoint exists
-        checkpoint_file = Path(config['workspace_dir']) / "checkpoint.json"
-        if checkpoint_file.exists():
-            with open(checkpoint_file, 'r') as f:
-                checkpoint = json.load(f)
+        # Collected and printed at once
+        lines = [
+            f"\n{'='*60}",
+            f"Workspace: {name} {'(CURRENT)' if is_current else ''}",
+            f"{'='*60}",
+            f"Description: {config.get('description', 'N/A')}",
+            f"PDF: {config['pdf_path']}",
+            f"Location: {config['workspace_dir']}",
+            f"Status: {config.get('status', 'unknown')}",
+            f"Created: {config.get('created_at', 'N/A')}",
+            f"Last accessed: {config.get('last_accessed', 'N/A')}"
+        ]
+        
+        # Check if checkpoint exists; loaded with the pages an interrupted run
+        # left in the append-only log
+        checkpoint = None
+        if os.path.isdir(config['workspace_dir']):
+            checkpoint_file = os.path.join(config['workspace_dir'], "checkpoint.json")
+            checkpoint = CheckpointManager(checkpoint_file).load_checkpoint(quiet=True)
+        if checkpoint is not None:
+            progress = checkpoint.get('progress')
+            if progress is not None:
+                completed, total = progress['completed'], progress['total']
+            else:
+                # Checkpoints saved before the progress summary existed
                 pages = checkpoint.get('pages', [])
                 completed = sum(1 for p in pages if p.get('latex_updated', False))
-                print(f"Progress: {completed}/{len(pages)} pages completed")
+                total = len(pages)
+            lines.append(f"Progress: {completed}/{total} pages completed")
         
-        print(f"{'='*60}\n")
\ No newline at end of file
+        lines.append(f"{'='*60}\n")
+        print("\n".join(lines))
\ No newline at end of file